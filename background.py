@@ -0,0 +1,138 @@
+import threading
+import traceback
+from engine import TetrisEngine
+from instrumentation import Instrumentation
+from search import SearchCancelled
+from stats import BoardStats
+
+
+def take_snapshot(engine):
+    # What the AI needs to choose a move, copied so the game can carry on while it works
+    return {
+        'board': engine.board.copy(with_colors=False),
+        'current': engine.current_tetromino,
+        'next': engine.next_tetromino,
+        'hold': engine.hold_tetromino,
+        'hold_used': engine.hold_used,
+    }
+
+
+class BackgroundAI:
+    # Chooses moves on a worker thread from snapshots of the game, so the render loop never waits for the AI.
+    # Every submit() supersedes the previous request: a search still running for an older snapshot is
+    # cancelled, and its result is never published.
+    # The worker logs and counts into its own instrumentation, handed over after every search and merged
+    # into the game's on the main thread, so the two threads never share counters or histograms.
+    def __init__(self, engine):
+        search = engine.search
+        self.instrumentation = engine.instrumentation
+        # The worker engine only ever chooses moves. It's built without the AI so its constructor
+        # doesn't choose one for a throwaway first piece.
+        self.worker = TetrisEngine(weights=engine.brain.get_weights(), vectorized=engine.vectorized,
+                                   search_depth=search.depth if search is not None else 1,
+                                   beam_width=search.beam_width if search is not None else None,
+                                   instrumentation=self.new_instrumentation(), ai=False,
+                                   width=engine.board.width, height=engine.board.height)
+        self.worker.ai = True
+        if self.worker.search is not None:
+            self.worker.search.should_stop = self.is_cancelled
+
+        self.condition = threading.Condition()
+        self.generation = 0  # Bumped by every submit
+        self.pending = None  # (generation, snapshot) waiting for the worker
+        self.working = None  # Generation the worker is on
+        self.result = None  # (generation, best move) ready to be collected
+        self.outstanding = False  # A submitted snapshot's move hasn't been collected yet
+        self.finished = []  # Worker instrumentation from finished searches, waiting to be merged
+        self.running = True
+
+        self.thread = threading.Thread(target=self.run, name='BackgroundAI', daemon=True)
+        self.thread.start()
+
+    def new_instrumentation(self):
+        # Metrics can be turned on mid-game, the worker picks that up with its next instrumentation
+        game = self.instrumentation
+        return Instrumentation(log_level=game.log_level, metrics=game.metrics, stream=game.stream)
+
+    def submit(self, engine):
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, take_snapshot(engine), self.new_instrumentation())
+            self.result = None
+            self.outstanding = True
+            self.condition.notify()
+
+    def is_cancelled(self):
+        # Runs on the worker thread, between search nodes
+        return self.working != self.generation or not self.running
+
+    def is_thinking(self):
+        return self.outstanding
+
+    def merge_metrics(self):
+        # On the main thread: the worker no longer touches instrumentation it has handed over
+        with self.condition:
+            finished, self.finished = self.finished, []
+        for instrumentation in finished:
+            self.instrumentation.merge(instrumentation)
+
+    def poll(self):
+        # The best move for the latest snapshot once it's ready (None if there's nowhere to put the piece),
+        # or False while it's still being worked on
+        self.merge_metrics()
+        with self.condition:
+            if self.result is None or self.result[0] != self.generation:
+                return False
+            best_move = self.result[1]
+            self.result = None
+            self.outstanding = False
+            return best_move
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                generation, snapshot, instrumentation = self.pending
+                self.pending = None
+                self.working = generation
+
+            self.worker.instrumentation = instrumentation
+            try:
+                best_move = self.choose(snapshot)
+                cancelled = False
+            except SearchCancelled:
+                best_move = None
+                cancelled = True
+            except Exception:
+                # Publish no move rather than let the thread die, which would leave the game waiting forever
+                instrumentation.error("Background AI failed to choose a move:\n%s", traceback.format_exc())
+                best_move = None
+                cancelled = False
+
+            with self.condition:
+                self.working = None
+                self.finished.append(instrumentation)
+                if not cancelled and generation == self.generation:
+                    self.result = (generation, best_move)
+
+    def choose(self, snapshot):
+        worker = self.worker
+        worker.board = snapshot['board']
+        worker.stats = BoardStats(worker.board)
+        worker.current_tetromino = snapshot['current']
+        worker.next_tetromino = snapshot['next']
+        worker.hold_tetromino = snapshot['hold']
+        worker.hold_used = snapshot['hold_used']
+        worker.rotation = 0
+        worker.generate_moves_for_current_piece()
+        return worker.best_move
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+        self.merge_metrics()
@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from engine import TetrisEngine, BlockMatrix, GRID_WIDTH, GRID_HEIGHT, SPAWN_POSITION
+from placement import PLACEMENTS
+from reachability import Reachability, reachable_placements
+from replay import play_replay, record
+from search import LookaheadSearch
+from selfplay import play_game
+from shape import TETROMINO_DATA
+from stats import BoardStats
+
+# Fixture boards are the boards seeded AI games reach after these many pieces
+FIXTURE_SEED = 2024
+FIXTURE_PIECES = (10, 40, 80)
+
+# Board widths the scaling group is run on, with the board height
+SCALING_WIDTHS = (10, 16, 20)
+SCALING_HEIGHT = GRID_HEIGHT
+
+# Headless games timed end to end
+GAME_SEEDS = (0, 1, 2, 3)
+GAME_MAX_PIECES = 200
+
+# A result this much slower than the baseline counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+BLOCK_SIZE = 30
+
+
+def measure(function, setup=None, number=200, repeat=5):
+    # Seconds per call, from the fastest of `repeat` rounds of `number` calls.
+    # A setup runs before every call, outside the timing, and its result is passed to the function.
+    rounds = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            elapsed = time.perf_counter() - start
+        else:
+            for _ in range(number):
+                state = setup()
+                start = time.perf_counter()
+                function(state)
+                elapsed += time.perf_counter() - start
+        rounds.append(elapsed / number)
+    return {'seconds': min(rounds), 'median_seconds': statistics.median(rounds), 'calls': number * repeat}
+
+
+def fixture_boards(width=GRID_WIDTH, height=GRID_HEIGHT):
+    # Realistic mid-game boards, reproduced exactly from a seeded AI game
+    engine = TetrisEngine(seed=FIXTURE_SEED, move_cache=False, width=width, height=height)
+    boards = []
+    pieces = 0
+    for target in FIXTURE_PIECES:
+        while pieces < target and not engine.game_over:
+            engine.play_best_move()
+            pieces += 1
+        boards.append(engine.board.copy())
+    return boards
+
+
+def board_with_full_rows(board, full_rows):
+    # A copy of the board with its bottom rows filled in completely
+    board = board.copy()
+    color = TETROMINO_DATA['I']['color']
+    for y in range(board.height - full_rows, board.height):
+        board.rows[y] = board.full_row
+        board.colors[y] = [color] * board.width
+    board.zobrist = board.compute_zobrist()
+    return board
+
+
+def engine_on(board, vectorized=False):
+    # A greedy engine playing on the given board, without the move cache so every call does the work
+    engine = TetrisEngine(seed=FIXTURE_SEED, move_cache=False, vectorized=vectorized, width=board.width,
+                          height=board.height)
+    engine.board = board
+    engine.stats = BoardStats(board)
+    engine.blockMatrix = BlockMatrix(board)
+    return engine
+
+
+def engine_benchmarks(boards):
+    results = {}
+    board = boards[-1]
+    engine = engine_on(board)
+    block_matrix = engine.blockMatrix
+    shape = TETROMINO_DATA['T']['rotations'][0]
+
+    results['check_collision'] = measure(lambda: engine.check_collision(shape, [4, 10]), number=5000)
+    results['simulate_instant_drop'] = measure(lambda: engine.simulate_instant_drop(shape, list(SPAWN_POSITION)), number=5000)
+
+    for name in ('count_holes', 'count_pillars', 'calculate_bumpiness', 'calculate_column_heights',
+                 'count_number_of_blocks_in_rightmost_lane', 'count_blocks_above_holes'):
+        results[f'block_matrix.{name}'] = measure(getattr(block_matrix, name), number=2000)
+    results['block_matrix.calculate_maximum_line_height'] = measure(
+        lambda: block_matrix.calculate_maximum_line_height(shape, [4, 10]), number=2000)
+    results['block_matrix.calculate_lines_cleared'] = measure(lambda: block_matrix.calculate_lines_cleared(board), number=2000)
+
+    for tetromino in PLACEMENTS:
+        results[f'generate_possible_moves.{tetromino}'] = measure(
+            lambda: engine.generate_possible_moves(tetromino, SPAWN_POSITION), number=100)
+
+    # The same moves scored in NumPy batches, skipped without NumPy
+    vectorized_engine = engine_on(board, vectorized=True)
+    if vectorized_engine.vectorized:
+        from vectorized import evaluate_placements
+        for tetromino in PLACEMENTS:
+            results[f'generate_possible_moves_vectorized.{tetromino}'] = measure(
+                lambda: vectorized_engine.generate_possible_moves(tetromino, SPAWN_POSITION), number=100)
+        placements = reachable_placements(board, 'T', SPAWN_POSITION)
+        results['evaluate_placements'] = measure(lambda: evaluate_placements(board, placements, engine.brain), number=500)
+
+    # The placement search on its own, and the input path to one placement
+    results['reachable_placements'] = measure(lambda: reachable_placements(board, 'T', SPAWN_POSITION), number=500)
+    placement, col, row = reachable_placements(board, 'T', SPAWN_POSITION)[-1]
+    results['reachability_path'] = measure(
+        lambda: Reachability(board, 'T', SPAWN_POSITION).path(placement.rotation, col, row), number=500)
+
+    # clear_lines changes the board, so every call gets a fresh copy
+    clearing_engine = engine_on(board)
+    for full_rows in range(5):
+        full_board = board_with_full_rows(boards[0], full_rows)
+
+        def setup():
+            clearing_engine.board = full_board.copy()
+            clearing_engine.stats = BoardStats(clearing_engine.board)
+            return clearing_engine
+
+        results[f'clear_lines.{full_rows}'] = measure(lambda state: state.clear_lines(), setup=setup, number=200)
+
+    return results
+
+
+def scaling_benchmarks():
+    # The move generator and the AI on wider boards. A call's cost divided by its candidate count
+    # should stay about flat as the board widens.
+    results = {}
+    for width in SCALING_WIDTHS:
+        board = fixture_boards(width, SCALING_HEIGHT)[-1]
+        engine = engine_on(board)
+        spawn = engine.spawn_position
+        candidates = len(reachable_placements(board, 'T', spawn))
+        search = LookaheadSearch(engine.brain, depth=2, beam_width=8)
+
+        def search_once():
+            search.transpositions.clear()
+            search.search(board, 'T', 'L', None, True)
+
+        timed = {
+            'generate_possible_moves': measure(lambda: engine.generate_possible_moves('T', spawn), number=100),
+            'reachable_placements': measure(lambda: reachable_placements(board, 'T', spawn), number=200),
+            'stats_preview': measure(lambda: engine.stats.preview(TETROMINO_DATA['T']['rotations'][0], (width // 2, 10)),
+                                     number=5000),
+            'search_depth_2': measure(search_once, number=5, repeat=3),
+        }
+        for name, result in timed.items():
+            result['candidates'] = candidates
+            results[f'scaling.{name}.w{width}'] = result
+    return results
+
+
+def game_benchmarks():
+    # End-to-end headless games, reported as seconds per game
+    start = time.perf_counter()
+    pieces = 0
+    for seed in GAME_SEEDS:
+        pieces += play_game(seed, max_pieces=GAME_MAX_PIECES)['pieces']
+    seconds = time.perf_counter() - start
+    results = {'headless_game': {
+        'seconds': seconds / len(GAME_SEEDS),
+        'calls': len(GAME_SEEDS),
+        'games_per_second': len(GAME_SEEDS) / seconds,
+        'pieces_per_second': pieces / seconds,
+    }}
+
+    # The rules alone: a recorded game played back without the AI
+    engine = TetrisEngine(seed=GAME_SEEDS[0], move_cache=False)
+    recorder = record(engine)
+    for _ in range(GAME_MAX_PIECES):
+        if not engine.play_best_move():
+            break
+    replay = recorder.finish()
+    results['replay_playback'] = measure(lambda: play_replay(replay), number=5)
+    results['replay_playback']['actions'] = len(replay.actions)
+    return results
+
+
+def render_benchmarks(boards):
+    # Offscreen frame times through SDL's dummy video driver, skipped without pygame
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    try:
+        import pygame
+        import draw
+    except ImportError:
+        return {}
+
+    pygame.init()
+    screen = pygame.display.set_mode((1024, 768))
+
+    # The engine has every attribute the draw functions read, apart from the window itself
+    host = engine_on(boards[-1].copy())
+    host.screen = screen
+    host.font = pygame.font.SysFont('Arial', 24)
+    width, height = host.board.width, host.board.height
+    host.play_area_x = (screen.get_width() - width * BLOCK_SIZE) // 2
+    host.play_area_y = (screen.get_height() - height * BLOCK_SIZE) // 2
+    host.show_rotation_points = False
+    host.show_perf_overlay = False
+    host.generate_moves_for_current_piece()
+
+    # Steady state: the piece slides a column back and forth over an otherwise unchanged board, so each
+    # frame repaints only the cells it and its ghost left and entered. The first frame is drawn in full.
+    position = host.tetromino_position
+    start_x = position[0]
+    draw.draw_frame(host, width, height, BLOCK_SIZE)
+
+    def draw_moving_piece_frame():
+        position[0] = start_x + (position[0] == start_x)
+        draw.draw_frame(host, width, height, BLOCK_SIZE)
+
+    color = TETROMINO_DATA['T']['color']
+    results = {
+        'draw_grid': measure(lambda: draw.draw_grid(host, width, height, BLOCK_SIZE), number=50),
+        'draw_clean_block': measure(lambda: draw.draw_clean_block(host, color, (host.play_area_x, host.play_area_y), BLOCK_SIZE),
+                                    number=2000),
+        'draw_full_frame': measure(lambda: draw.draw_full_frame(host, width, height, BLOCK_SIZE), number=50),
+        'draw_frame_moving_piece': measure(draw_moving_piece_frame, number=200),
+    }
+    pygame.quit()
+    return results
+
+
+def run_benchmarks(groups=('engine', 'scaling', 'game', 'render')):
+    boards = fixture_boards()
+    results = {}
+    if 'engine' in groups:
+        results.update(engine_benchmarks(boards))
+    if 'scaling' in groups:
+        results.update(scaling_benchmarks())
+    if 'game' in groups:
+        results.update(game_benchmarks())
+    if 'render' in groups:
+        results.update(render_benchmarks(boards))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    # (name, baseline seconds, seconds, ratio, regressed) for every benchmark in both reports
+    rows = []
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['seconds']
+        ratio = result['seconds'] / before if before else 1.0
+        rows.append((name, before, result['seconds'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_report(report, file=sys.stderr):
+    for name, result in report['results'].items():
+        print(f"{name:<52}{result['seconds'] * 1e6:>14.2f} us", file=file)
+
+
+def print_comparison(rows, file=sys.stderr):
+    print(f"{'':<52}{'baseline':>14}{'now':>14}{'ratio':>9}", file=file)
+    for name, before, after, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<52}{before * 1e6:>11.2f} us{after * 1e6:>11.2f} us{ratio:>9.2f}{flag}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the engine, AI and renderer on seeded fixtures.')
+    parser.add_argument('--groups', nargs='+', choices=('engine', 'scaling', 'game', 'render'),
+                        default=('engine', 'scaling', 'game', 'render'))
+    parser.add_argument('--output', default=None, help='write the results here as JSON')
+    parser.add_argument('--baseline', default=None, help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown (0.1 = 10%%) flagged as a regression')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.groups)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if not args.baseline:
+        print_report(report)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        rows = compare(report, json.load(baseline_file), args.threshold)
+    print_comparison(rows)
+
+    # A non-zero exit status lets scripts fail on regressions
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
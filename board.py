@@ -0,0 +1,144 @@
+import random
+from color import BLACK
+
+# Random 64-bit keys per cell, one table per board size, fixed so hashes are stable between runs
+ZOBRIST_SEED = 0x7E7215
+ZOBRIST_TABLES = {}
+
+
+def zobrist_table(width, height):
+    if (width, height) not in ZOBRIST_TABLES:
+        rng = random.Random(ZOBRIST_SEED)
+        ZOBRIST_TABLES[(width, height)] = [[rng.getrandbits(64) for _ in range(width)] for _ in range(height)]
+    return ZOBRIST_TABLES[(width, height)]
+
+
+class Board:
+    # Occupancy is stored as one integer bitmask per row (bit x set = cell (x, y) filled).
+    # Colors live in a separate layer that only the renderer reads.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rows = [0 for _ in range(height)]
+        self.colors = [[BLACK for _ in range(width)] for _ in range(height)]
+
+        # Zobrist hash of the occupied cells, updated incrementally as cells are set and cleared
+        self.zobrist_table = zobrist_table(width, height)
+        self.zobrist = 0
+
+    def copy(self, with_colors=True):
+        # Searches only need occupancy, so they can skip copying the color layer
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.full_row = self.full_row
+        board.rows = list(self.rows)
+        board.colors = [list(row) for row in self.colors] if with_colors else None
+        board.zobrist_table = self.zobrist_table
+        board.zobrist = self.zobrist
+        return board
+
+    def compute_zobrist(self):
+        zobrist = 0
+        for y, row in enumerate(self.rows):
+            keys = self.zobrist_table[y]
+            while row:
+                lowest_bit = row & -row
+                zobrist ^= keys[lowest_bit.bit_length() - 1]
+                row ^= lowest_bit
+        return zobrist
+
+    def is_occupied(self, x, y):
+        return (self.rows[y] >> x) & 1 == 1
+
+    def collides(self, tetromino, position):
+        rows = self.rows
+        for x, y in tetromino:
+            grid_x = int(x + position[0])
+            grid_y = int(y + position[1])
+
+            # Check boundary conditions
+            if grid_x < 0 or grid_x >= self.width or grid_y >= self.height:
+                return True
+
+            # Check for collisions with locked blocks
+            if grid_y >= 0 and (rows[grid_y] >> grid_x) & 1:
+                return True
+
+        return False
+
+    def place(self, tetromino, position, color):
+        for x, y in tetromino:
+            grid_x = x + position[0]
+            grid_y = y + position[1]
+            self.rows[grid_y] |= 1 << grid_x
+            self.colors[grid_y][grid_x] = color
+            self.zobrist ^= self.zobrist_table[grid_y][grid_x]
+
+    def column_heights(self):
+        heights = [0] * self.width
+        blocks_seen = 0
+        for row_index, row in enumerate(self.rows):
+            new_columns = row & ~blocks_seen  # Columns whose top block is in this row
+            while new_columns:
+                lowest_bit = new_columns & -new_columns
+                heights[lowest_bit.bit_length() - 1] = self.height - row_index  # Height from the bottom
+                new_columns ^= lowest_bit
+            blocks_seen |= row
+        return heights
+
+    def apply(self, tetromino, position):
+        # Set a piece's occupancy bits without touching the color layer, undo() reverts it.
+        # The piece must not overlap filled cells, which holds for any non-colliding position.
+        placed = []
+        for x, y in tetromino:
+            grid_x = x + position[0]
+            grid_y = y + position[1]
+            bit = 1 << grid_x
+            self.rows[grid_y] |= bit
+            self.zobrist ^= self.zobrist_table[grid_y][grid_x]
+            placed.append((grid_x, grid_y, bit))
+        return placed
+
+    def undo(self, placed):
+        for grid_x, grid_y, bit in placed:
+            self.rows[grid_y] &= ~bit
+            self.zobrist ^= self.zobrist_table[grid_y][grid_x]
+
+    def count_full_rows(self):
+        full_row = self.full_row
+        return sum(1 for row in self.rows if row == full_row)
+
+    def clear_full_rows(self, candidate_rows=None):
+        # Remove the full rows and compact the board in one pass, colors along with them.
+        # Only candidate_rows are checked when given: after a lock, no row the piece missed can have filled up.
+        # Returns the indices the cleared rows had, top to bottom.
+        rows = self.rows
+        full_row = self.full_row
+        if candidate_rows is None:
+            candidate_rows = range(self.height)
+        cleared_rows = sorted(y for y in set(candidate_rows) if 0 <= y < self.height and rows[y] == full_row)
+        if not cleared_rows:
+            return cleared_rows
+
+        # Walk up from the lowest cleared row, moving every kept row down over the gaps below it.
+        # Rows and colors are mutated in place so anyone holding a reference to them sees the new board.
+        colors = self.colors
+        cleared = set(cleared_rows)
+        target = cleared_rows[-1]
+        for y in range(cleared_rows[-1], -1, -1):
+            if y in cleared:
+                continue
+            rows[target] = rows[y]
+            if colors is not None:
+                colors[target] = colors[y]
+            target -= 1
+        for y in range(target + 1):
+            rows[y] = 0
+            if colors is not None:
+                colors[y] = [BLACK for _ in range(self.width)]
+
+        # Every cell above a cleared row moved, so the hash is rebuilt (line clears are rare)
+        self.zobrist = self.compute_zobrist()
+        return cleared_rows
@@ -1,3 +1,16 @@
+import json
+
+# Constructor arguments of Brain, in order
+WEIGHT_NAMES = (
+    'holes_weight',
+    'blocks_above_holes_weight',
+    'pillars_weight',
+    'max_height_weight',
+    'bumpiness_weight',
+    'blocks_in_rightmost_lane_weight',
+)
+
+
 class Brain:
     def __init__(self, holes_weight, blocks_above_holes_weight,pillars_weight, max_height_weight, bumpiness_weight, blocks_in_rightmost_lane_weight):
         # Initialize multipliers for each stat
@@ -45,9 +58,27 @@ class Brain:
         if blocks_in_rightmost_lane_weight is not None:
             self.blocks_in_rightmost_lane_weight = blocks_in_rightmost_lane_weight
 
+    def get_weights(self):
+        return {name: getattr(self, name) for name in WEIGHT_NAMES}
+
     def print_multipliers(self):
         print(f"Holes weight: {self.holes_weight}")
         print(f"Pillars weight: {self.pillars_weight}")
         print(f"Max height weight: {self.max_height_weight}")
         print(f"Bumpiness weight: {self.bumpiness_weight}")
         print(f"Blocks in rightmost lane weight: {self.blocks_in_rightmost_lane_weight}")
+
+
+def load_weights(path):
+    # Read a weight set written by save_weights (or the tuner), ready to pass as Brain(**weights)
+    with open(path) as weights_file:
+        data = json.load(weights_file)
+    return {name: data[name] for name in WEIGHT_NAMES}
+
+
+def save_weights(weights, path, **extra):
+    # Write a weight set as JSON, with any extra fields (fitness, generation, ...) alongside it
+    data = {name: weights[name] for name in WEIGHT_NAMES}
+    data.update(extra)
+    with open(path, 'w') as weights_file:
+        json.dump(data, weights_file, indent=2)
@@ -0,0 +1,75 @@
+import sys
+from collections import OrderedDict
+
+# Default memory cap, enough for tens of thousands of cached moves
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def estimate_size(value):
+    # Rough deep size of a cached value (dicts, lists and tuples of small objects)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class MoveCache:
+    # Bounded LRU memo of best moves, keyed by the board's Zobrist hash plus the pieces and weights.
+    # The least recently used entries are evicted once the estimated size goes over max_bytes.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        # Returns (move, score) or None
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, move, score):
+        if key in self.entries:
+            self.bytes_used -= self.entries.pop(key)[2]
+        size = estimate_size(key) + estimate_size(move) + sys.getsizeof(score)
+        self.entries[key] = (move, score, size)
+        self.bytes_used += size
+
+        while self.entries and (self.bytes_used > self.max_bytes or
+                                (self.max_entries is not None and len(self.entries) > self.max_entries)):
+            _, (_, _, evicted_size) = self.entries.popitem(last=False)
+            self.bytes_used -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes_used = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self):
+        return {
+            'entries': len(self.entries),
+            'bytes_used': self.bytes_used,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate(),
+        }
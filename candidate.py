@@ -0,0 +1,46 @@
+import heapq
+from operator import attrgetter
+
+# Sort key for candidates, lowest weight is best
+by_weight = attrgetter('weight')
+
+
+class Candidate:
+    # One scored placement. The AI makes thousands of these per move once it looks ahead, so each one is a
+    # few slots pointing at shared data: the placement geometry belongs to PLACEMENTS, and the feature vector
+    # isn't kept. The move dict the rest of the game works with is only built for the winner.
+    __slots__ = ('weight', 'placement', 'col', 'row')
+
+    def __init__(self, weight, placement, col, row):
+        self.weight = weight
+        self.placement = placement
+        self.col = col
+        self.row = row
+
+    @property
+    def rotation(self):
+        return self.placement.rotation
+
+    @property
+    def cells(self):
+        return self.placement.cells
+
+    @property
+    def position(self):
+        return [self.col, self.row]
+
+
+def best_candidate(candidates):
+    # The first of the lowest-weight candidates, streamed so they never have to be held in a list.
+    # None if there are none.
+    best = None
+    for candidate in candidates:
+        if best is None or candidate.weight < best.weight:
+            best = candidate
+    return best
+
+
+def best_candidates(candidates, count):
+    # The `count` lowest-weight candidates, best first, equal weights in the order they came.
+    # Only a heap of `count` candidates is kept while streaming through them.
+    return heapq.nsmallest(count, candidates, key=by_weight)
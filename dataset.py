@@ -0,0 +1,198 @@
+import json
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only the training-data export needs it
+    np = None
+
+from candidate import best_candidates
+from engine import GRID_WIDTH, GRID_HEIGHT
+from features import FEATURE_NAMES
+from placement import PLACEMENTS
+from shape import TETROMINO_DATA
+
+# File layout: MAGIC, a little-endian uint32 header length, a JSON header, zero padding up to HEADER_ALIGNMENT,
+# then fixed-size records back to back, so the records can be memory-mapped straight from disk
+MAGIC = b'TETRDATA'
+DATASET_VERSION = 2
+HEADER_ALIGNMENT = 64
+
+# Piece codes in the records, NO_PIECE for an empty hold slot or no chosen move
+PIECES = tuple(TETROMINO_DATA)
+NO_PIECE = 255
+NO_CHOICE = 255
+
+# Records are buffered and written this many at a time
+WRITE_BATCH = 1024
+
+
+def is_available():
+    return np is not None
+
+
+def max_candidates(width=GRID_WIDTH):
+    # Candidate slots per record: twice the most straight-drop placements any tetromino has on a board this wide.
+    # Slides and spins under overhangs rarely add more than a few placements to those.
+    return 2 * max(sum(len(placement.columns(width)) for placement in placements) for placements in PLACEMENTS.values())
+
+
+def record_dtype(width=GRID_WIDTH, height=GRID_HEIGHT):
+    # One record per placed piece. Unused candidate slots past candidate_count are left zeroed.
+    if width > 32:
+        raise ValueError(f"Boards wider than 32 columns don't fit the row bitmasks: {width}")
+    candidates = max_candidates(width)
+    return np.dtype([
+        ('seed', '<u4'),
+        ('piece_index', '<u4'),  # Pieces placed before this one in the game
+        ('rows', '<u4', (height,)),  # Row bitmasks before the placement, bit x = column x
+        ('current', 'u1'),
+        ('next', 'u1'),
+        ('hold', 'u1'),
+        ('placed', 'u1'),  # The piece actually placed, the hold piece if the AI swapped
+        ('used_hold', 'u1'),
+        ('candidate_count', 'u1'),
+        ('chosen', 'u1'),  # Index of the chosen candidate
+        ('candidate_rotation', 'u1', (candidates,)),
+        ('candidate_x', 'i1', (candidates,)),
+        ('candidate_y', 'i1', (candidates,)),
+        ('candidate_features', '<i2', (candidates, len(FEATURE_NAMES))),
+        ('candidate_weight', '<f4', (candidates,)),
+    ])
+
+
+def piece_code(tetromino):
+    return NO_PIECE if tetromino is None else PIECES.index(tetromino)
+
+
+def encode_header(width, height):
+    header = json.dumps({
+        'version': DATASET_VERSION,
+        'width': width,
+        'height': height,
+        'max_candidates': max_candidates(width),
+        'pieces': PIECES,
+        'features': FEATURE_NAMES,
+    }).encode()
+    size = len(MAGIC) + 4 + len(header)
+    padding = -size % HEADER_ALIGNMENT
+    return MAGIC + struct.pack('<I', len(header) + padding) + header + b' ' * padding
+
+
+def read_header(dataset_file):
+    # Returns (header dict, offset of the first record)
+    magic = dataset_file.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not a training data file")
+    (length,) = struct.unpack('<I', dataset_file.read(4))
+    header = json.loads(dataset_file.read(length))
+    if header['version'] != DATASET_VERSION:
+        raise ValueError(f"Unsupported training data version: {header['version']}")
+    return header, len(MAGIC) + 4 + length
+
+
+class DatasetWriter:
+    # Appends one record per AI placement, a batch at a time, so a run's data is never held in memory.
+    # Appending to an existing file checks that its header matches first.
+    def __init__(self, path, width=GRID_WIDTH, height=GRID_HEIGHT):
+        if np is None:
+            raise RuntimeError("Writing training data needs NumPy")
+        self.dtype = record_dtype(width, height)
+        self.candidates = max_candidates(width)
+        self.buffer = np.zeros(WRITE_BATCH, dtype=self.dtype)
+        self.pending = 0
+        self.written = 0
+        self.truncated = 0  # Records with more candidates than slots
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as existing:
+                header, _ = read_header(existing)
+            if (header['width'], header['height']) != (width, height):
+                raise ValueError(f"{path} holds {header['width']}x{header['height']} boards, not {width}x{height}")
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'ab')
+            self.file.write(encode_header(width, height))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def write_decision(self, engine, piece_index=0):
+        # Record the AI's choice for the engine's current piece, before its steps are played.
+        # Does nothing when the AI has no move.
+        best_move = engine.best_move
+        if best_move is None:
+            return
+        used_hold = bool(best_move.get('hold')) and not engine.hold_used
+        placed = best_move['tetromino']
+
+        record = self.buffer[self.pending]
+        record['seed'] = engine.seed % 2 ** 32
+        record['piece_index'] = piece_index
+        record['rows'] = engine.board.rows
+        record['current'] = piece_code(engine.current_tetromino)
+        record['next'] = piece_code(engine.next_tetromino)
+        record['hold'] = piece_code(engine.hold_tetromino)
+        record['placed'] = piece_code(placed)
+        record['used_hold'] = used_hold
+
+        # Every candidate the move generator offers for the placed piece, with its full feature vector
+        candidates = engine.generate_possible_moves(placed, engine.spawn_position)
+        chosen = (best_move['rotation'], list(best_move['position']))
+        if len(candidates) > self.candidates:
+            # More reachable placements than slots: keep the chosen one and the lowest weights of the rest,
+            # still in the generator's order. A lookahead search can choose a placement whose own weight
+            # isn't among the lowest.
+            others = [candidate for candidate in candidates if (candidate.rotation, candidate.position) != chosen]
+            slots = self.candidates - (len(others) < len(candidates))
+            kept = {id(candidate) for candidate in best_candidates(others, slots)}
+            engine.instrumentation.debug("Training data: %d candidates, keeping %d", len(candidates), self.candidates)
+            candidates = [candidate for candidate in candidates
+                          if id(candidate) in kept or (candidate.rotation, candidate.position) == chosen]
+            self.truncated += 1
+            engine.instrumentation.count('dataset_truncated')
+        record['candidate_count'] = len(candidates)
+        record['chosen'] = NO_CHOICE
+        for index, candidate in enumerate(candidates):
+            record['candidate_rotation'][index] = candidate.rotation
+            record['candidate_x'][index] = candidate.col
+            record['candidate_y'][index] = candidate.row
+            record['candidate_features'][index] = engine.stats.preview(candidate.cells, (candidate.col, candidate.row))
+            record['candidate_weight'][index] = candidate.weight
+            if (candidate.rotation, candidate.position) == chosen:
+                record['chosen'] = index
+
+        self.pending += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.written += self.pending
+            self.buffer[:self.pending] = 0  # Unused candidate slots have to stay zeroed for the next batch
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def load_dataset(path, mode='r'):
+    # Memory-map a training data file as a record array, nothing is read until it's indexed
+    if np is None:
+        raise RuntimeError("Reading training data needs NumPy")
+    with open(path, 'rb') as dataset_file:
+        header, offset = read_header(dataset_file)
+    dtype = record_dtype(header['width'], header['height'])
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=(count,))
@@ -2,6 +2,31 @@ import pygame
 from shape import TETROMINO_DATA
 from color import BLACK, WHITE, RED, GREEN, BLUE, CYAN, NEON_BLUE, YELLOW, MAGENTA, ORANGE, LIGHT_GRAY
 
+# Pre-rendered sprites, built the first time each (color, block size) is drawn
+BLOCK_SPRITES = {}
+OVERLAY_SPRITES = {}
+
+def get_block_sprite(color, BLOCK_SIZE):
+    key = (tuple(color), BLOCK_SIZE)
+    sprite = BLOCK_SPRITES.get(key)
+    if sprite is None:
+        # One pixel larger than the block, the bevel reaches into the cells to the right and below
+        sprite = pygame.Surface((BLOCK_SIZE + 1, BLOCK_SIZE + 1), pygame.SRCALPHA)
+        render_clean_block(sprite, color, (0, 0), BLOCK_SIZE)
+        BLOCK_SPRITES[key] = sprite
+    return sprite
+
+def get_overlay_sprite(color, BLOCK_SIZE):
+    # A 50% transparent block, used by the ghost piece and the best move
+    key = (tuple(color), BLOCK_SIZE)
+    sprite = OVERLAY_SPRITES.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
+        r, g, b = color
+        sprite.fill((r, g, b, 128))  # 128 is the alpha value (50% transparency)
+        OVERLAY_SPRITES[key] = sprite
+    return sprite
+
 def draw_grid(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
     # Fill the screen with a light grey background
     self.screen.fill(LIGHT_GRAY)
@@ -9,26 +34,35 @@ def draw_grid(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
     # Draw each block in the grid with highlights for placed blocks
     for y in range(GRID_HEIGHT):
         for x in range(GRID_WIDTH):
-            # If the grid cell is not empty (i.e., contains a locked block), draw it with a highlight
-            if self.grid[y][x] != BLACK:
-                draw_clean_block(self, self.grid[y][x], 
-                                (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE),
-                                BLOCK_SIZE)
-            else:
-                # Otherwise, draw an empty grid cell
-                pygame.draw.rect(self.screen, BLACK,
-                                 (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
-                                  BLOCK_SIZE, BLOCK_SIZE), 0)
+            draw_grid_cell(self, x, y, BLOCK_SIZE)
 
     # After drawing blocks, draw the grid lines in white, but only for empty spaces
     for y in range(GRID_HEIGHT):
         for x in range(GRID_WIDTH):
-            # Only draw grid lines (white) on empty cells
-            if self.grid[y][x] == BLACK:
-                pygame.draw.rect(self.screen, WHITE,
-                                 (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
-                                  BLOCK_SIZE, BLOCK_SIZE), 1)
-
+            draw_grid_line(self, x, y, BLOCK_SIZE)
+
+    draw_play_area_outline(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+
+def draw_grid_cell(self, x, y, BLOCK_SIZE):
+    # If the grid cell is not empty (i.e., contains a locked block), draw it with a highlight
+    if self.board.colors[y][x] != BLACK:
+        draw_clean_block(self, self.board.colors[y][x], 
+                        (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE),
+                        BLOCK_SIZE)
+    else:
+        # Otherwise, draw an empty grid cell
+        pygame.draw.rect(self.screen, BLACK,
+                         (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
+                          BLOCK_SIZE, BLOCK_SIZE), 0)
+
+def draw_grid_line(self, x, y, BLOCK_SIZE):
+    # Only draw grid lines (white) on empty cells
+    if self.board.colors[y][x] == BLACK:
+        pygame.draw.rect(self.screen, WHITE,
+                         (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
+                          BLOCK_SIZE, BLOCK_SIZE), 1)
+
+def draw_play_area_outline(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
     # Draw an outline for the play area outside the blocks, ensuring it doesn't overlap with the blocks
     pygame.draw.rect(self.screen, WHITE, (self.play_area_x - 2, self.play_area_y - 2, GRID_WIDTH * BLOCK_SIZE + 4, GRID_HEIGHT * BLOCK_SIZE + 4), 4)
 
@@ -62,12 +96,16 @@ def draw_held_piece(self, BLOCK_SIZE):
                          (self.play_area_x - 6 * BLOCK_SIZE + (x + offset_x) * BLOCK_SIZE,
                           self.play_area_y + (y + offset_y) * BLOCK_SIZE), BLOCK_SIZE)
 
+def get_next_box_x(self, BLOCK_SIZE):
+    # The next piece box sits one block right of the play area, however wide the board is
+    return self.play_area_x + (self.board.width + 1) * BLOCK_SIZE
+
 def draw_next_piece(self, BLOCK_SIZE):
     # Draw the box around the next piece with a label
     label = self.font.render('Next', True, WHITE)
-    self.screen.blit(label, (self.play_area_x + 11 * BLOCK_SIZE, self.play_area_y - 2 * BLOCK_SIZE))
+    self.screen.blit(label, (get_next_box_x(self, BLOCK_SIZE), self.play_area_y - 2 * BLOCK_SIZE))
 
-    pygame.draw.rect(self.screen, WHITE, (self.play_area_x + 11 * BLOCK_SIZE, self.play_area_y, 5 * BLOCK_SIZE, 5 * BLOCK_SIZE), 3)
+    pygame.draw.rect(self.screen, WHITE, (get_next_box_x(self, BLOCK_SIZE), self.play_area_y, 5 * BLOCK_SIZE, 5 * BLOCK_SIZE), 3)
 
     # Get the held tetromino data (rotations, color, and rotation point)
     tetromino_data = TETROMINO_DATA[self.next_tetromino]
@@ -88,7 +126,7 @@ def draw_next_piece(self, BLOCK_SIZE):
     # Draw the next tetromino centered in the box
     for x, y in shape:
         draw_clean_block(self, color, 
-                         (self.play_area_x + 11 * BLOCK_SIZE + offset_x + x * BLOCK_SIZE,
+                         (get_next_box_x(self, BLOCK_SIZE) + offset_x + x * BLOCK_SIZE,
                           self.play_area_y + offset_y + y * BLOCK_SIZE), BLOCK_SIZE)
 
 def draw_tetromino(self, tetromino, position, color, BLOCK_SIZE):
@@ -107,8 +145,11 @@ def draw_tetromino(self, tetromino, position, color, BLOCK_SIZE):
                             self.play_area_y + (position[1] + rotation_point[1]) * BLOCK_SIZE), 5)
 
 def draw_clean_block(self, color, position, BLOCK_SIZE):
+    self.screen.blit(get_block_sprite(color, BLOCK_SIZE), position)
+
+def render_clean_block(surface, color, position, BLOCK_SIZE):
     # Draw the base block with a solid color
-    pygame.draw.rect(self.screen, color, (position[0], position[1], BLOCK_SIZE, BLOCK_SIZE))
+    pygame.draw.rect(surface, color, (position[0], position[1], BLOCK_SIZE, BLOCK_SIZE))
 
     # Create highlight and shadow colors based on the block's original color
     r, g, b = color
@@ -118,20 +159,20 @@ def draw_clean_block(self, color, position, BLOCK_SIZE):
     shadow_bottom = (max(r - 60, 0), max(g - 60, 0), max(b - 60, 0))  # Stronger shadow for the bottom
 
     # Add highlights (top and left sides) with thicker lines
-    pygame.draw.polygon(self.screen, highlight, [(position[0], position[1]), (position[0] + BLOCK_SIZE, position[1]), (position[0] + BLOCK_SIZE - 4, position[1] + 4), (position[0] + 4, position[1] + 4)])  # Top
-    pygame.draw.polygon(self.screen, highlight, [(position[0], position[1]), (position[0], position[1] + BLOCK_SIZE), (position[0] + 4, position[1] + BLOCK_SIZE - 4), (position[0] + 4, position[1] + 4)])  # Left
+    pygame.draw.polygon(surface, highlight, [(position[0], position[1]), (position[0] + BLOCK_SIZE, position[1]), (position[0] + BLOCK_SIZE - 4, position[1] + 4), (position[0] + 4, position[1] + 4)])  # Top
+    pygame.draw.polygon(surface, highlight, [(position[0], position[1]), (position[0], position[1] + BLOCK_SIZE), (position[0] + 4, position[1] + BLOCK_SIZE - 4), (position[0] + 4, position[1] + 4)])  # Left
 
     # Add mid-highlight further towards the center for smoother blending
-    pygame.draw.line(self.screen, mid_highlight, (position[0] + 4, position[1] + 4), (position[0] + BLOCK_SIZE - 4, position[1] + 4), 3)  # Top blend
-    pygame.draw.line(self.screen, mid_highlight, (position[0] + 4, position[1] + 4), (position[0] + 4, position[1] + BLOCK_SIZE - 4), 3)  # Left blend
+    pygame.draw.line(surface, mid_highlight, (position[0] + 4, position[1] + 4), (position[0] + BLOCK_SIZE - 4, position[1] + 4), 3)  # Top blend
+    pygame.draw.line(surface, mid_highlight, (position[0] + 4, position[1] + 4), (position[0] + 4, position[1] + BLOCK_SIZE - 4), 3)  # Left blend
 
     # Add shadows (bottom and right sides)
-    pygame.draw.polygon(self.screen, shadow_bottom, [(position[0], position[1] + BLOCK_SIZE - 1), (position[0] + BLOCK_SIZE, position[1] + BLOCK_SIZE - 1), (position[0] + BLOCK_SIZE - 4, position[1] + BLOCK_SIZE - 5), (position[0] + 4, position[1] + BLOCK_SIZE - 5)])  # Bottom
-    pygame.draw.polygon(self.screen, shadow_right, [(position[0] + BLOCK_SIZE - 1, position[1]), (position[0] + BLOCK_SIZE - 1, position[1] + BLOCK_SIZE), (position[0] + BLOCK_SIZE - 5, position[1] + BLOCK_SIZE - 4), (position[0] + BLOCK_SIZE - 5, position[1] + 4)])  # Right
+    pygame.draw.polygon(surface, shadow_bottom, [(position[0], position[1] + BLOCK_SIZE - 1), (position[0] + BLOCK_SIZE, position[1] + BLOCK_SIZE - 1), (position[0] + BLOCK_SIZE - 4, position[1] + BLOCK_SIZE - 5), (position[0] + 4, position[1] + BLOCK_SIZE - 5)])  # Bottom
+    pygame.draw.polygon(surface, shadow_right, [(position[0] + BLOCK_SIZE - 1, position[1]), (position[0] + BLOCK_SIZE - 1, position[1] + BLOCK_SIZE), (position[0] + BLOCK_SIZE - 5, position[1] + BLOCK_SIZE - 4), (position[0] + BLOCK_SIZE - 5, position[1] + 4)])  # Right
 
     # Final shadow blending
-    pygame.draw.line(self.screen, shadow_right, (position[0] + BLOCK_SIZE - 5, position[1] + 4), (position[0] + BLOCK_SIZE - 5, position[1] + BLOCK_SIZE - 4), 2)  # Right blend
-    pygame.draw.line(self.screen, shadow_bottom, (position[0] + 4, position[1] + BLOCK_SIZE - 5), (position[0] + BLOCK_SIZE - 4, position[1] + BLOCK_SIZE - 5), 2)  # Bottom blend
+    pygame.draw.line(surface, shadow_right, (position[0] + BLOCK_SIZE - 5, position[1] + 4), (position[0] + BLOCK_SIZE - 5, position[1] + BLOCK_SIZE - 4), 2)  # Right blend
+    pygame.draw.line(surface, shadow_bottom, (position[0] + 4, position[1] + BLOCK_SIZE - 5), (position[0] + BLOCK_SIZE - 4, position[1] + BLOCK_SIZE - 5), 2)  # Bottom blend
 
 def draw_best_move(self, BLOCK_SIZE):
     if hasattr(self, 'best_move') and self.best_move:
@@ -139,26 +180,37 @@ def draw_best_move(self, BLOCK_SIZE):
         best_tetromino_shape = self.best_move['tetromino_shape']
         best_position = self.best_move['position']
 
-        # Create a transparent surface for the best move tetromino
-        best_move_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-        
-        # Calculate a 50% transparent orange color (for the best move)
-        transparent_orange = (255, 165, 0, 128)  # 128 is the alpha value (50% transparency)
-        
-        # Fill the surface with the transparent orange color
-        best_move_surface.fill(transparent_orange)
+        # Transparent orange surface for the best move tetromino
+        best_move_surface = get_overlay_sprite((255, 165, 0), BLOCK_SIZE)
 
         # Draw the best move's tetromino as both filled (with transparency) and outlined
         for x, y in best_tetromino_shape:
-            # Draw the transparent block
-            self.screen.blit(best_move_surface, (self.play_area_x + (x + best_position[0]) * BLOCK_SIZE,
-                                                 self.play_area_y + (y + best_position[1]) * BLOCK_SIZE))
-            
-            # Draw the outline (not transparent)
-            best_rect = pygame.Rect(self.play_area_x + (x + best_position[0]) * BLOCK_SIZE,
-                                    self.play_area_y + (y + best_position[1]) * BLOCK_SIZE,
-                                    BLOCK_SIZE, BLOCK_SIZE)
-            pygame.draw.rect(self.screen, ORANGE, best_rect, 2)  # Draw border with thickness 2
+            draw_best_move_block(self, best_move_surface, x + best_position[0], y + best_position[1], BLOCK_SIZE)
+    elif is_ai_thinking(self):
+        draw_thinking(self, BLOCK_SIZE)
+
+def is_ai_thinking(self):
+    # True while the background AI is still choosing a move for the current piece
+    return hasattr(self, 'ai_thinking') and self.ai_thinking()
+
+def draw_thinking(self, BLOCK_SIZE):
+    # Shown under the play area in place of the best move until the AI has one
+    text = self.font.render("Thinking...", True, ORANGE)
+    self.screen.blit(text, get_thinking_rect(self, BLOCK_SIZE))
+
+def get_thinking_rect(self, BLOCK_SIZE):
+    width, height = self.font.size("Thinking...")
+    return pygame.Rect(self.play_area_x + (self.board.width * BLOCK_SIZE - width) // 2,
+                       self.play_area_y + self.board.height * BLOCK_SIZE + 8, width, height)
+
+def draw_best_move_block(self, best_move_surface, x, y, BLOCK_SIZE):
+    # Draw the transparent block
+    self.screen.blit(best_move_surface, (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE))
+    
+    # Draw the outline (not transparent)
+    best_rect = pygame.Rect(self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
+                            BLOCK_SIZE, BLOCK_SIZE)
+    pygame.draw.rect(self.screen, ORANGE, best_rect, 2)  # Draw border with thickness 2
 
 
 def draw_game_info(self):
@@ -172,6 +224,18 @@ def draw_game_info(self):
     self.screen.blit(level_text, (self.play_area_x, self.play_area_y - 50))  # Next to the score
     self.screen.blit(speed_text, (self.play_area_x, self.play_area_y - 25))  # Next to the level
 
+def get_perf_overlay_lines(self):
+    # The performance overlay's text, empty while it's hidden
+    if not getattr(self, 'show_perf_overlay', False):
+        return ()
+    return self.frame_stats.lines
+
+def draw_perf_overlay(self, BLOCK_SIZE):
+    # Frame timings and AI figures under the next piece box, one line per value
+    for index, line in enumerate(get_perf_overlay_lines(self)):
+        text = self.font.render(line, True, WHITE)
+        self.screen.blit(text, (get_next_box_x(self, BLOCK_SIZE), self.play_area_y + 6 * BLOCK_SIZE + index * 25))
+
 def draw_ghost_piece(self, tetromino, position, color, BLOCK_SIZE):
     # Make a copy of the current position for the ghost piece
     ghost_position = position.copy()
@@ -179,26 +243,184 @@ def draw_ghost_piece(self, tetromino, position, color, BLOCK_SIZE):
     # Simulate dropping the tetromino down to the furthest valid position
     ghost_position = self.simulate_instant_drop(tetromino, ghost_position)
 
-    # Create a transparent surface for the ghost tetromino
-    ghost_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-    
-    # Calculate a 50% transparent version of the color
-    r, g, b = color
-    transparent_color = (r, g, b, 128)  # 128 is the alpha value (50% transparency)
-    
-    # Fill the surface with the transparent color
-    ghost_surface.fill(transparent_color)
-    
+    # Transparent surface in the piece's color for the ghost tetromino
+    ghost_surface = get_overlay_sprite(color, BLOCK_SIZE)
+
     # Draw the ghost piece as both filled (with transparency) and outlined
     for x, y in tetromino:
-        # Draw the transparent block
-        self.screen.blit(ghost_surface, (self.play_area_x + (x + ghost_position[0]) * BLOCK_SIZE,
-                                         self.play_area_y + (y + ghost_position[1]) * BLOCK_SIZE))
-        
-        # Draw the outline (not transparent)
-        ghost_rect = pygame.Rect(self.play_area_x + (x + ghost_position[0]) * BLOCK_SIZE,
-                                 self.play_area_y + (y + ghost_position[1]) * BLOCK_SIZE,
-                                 BLOCK_SIZE, BLOCK_SIZE)
-        pygame.draw.rect(self.screen, color, ghost_rect, 1)  # Draw outline (thinner than real blocks)
-
+        draw_ghost_block(self, ghost_surface, color, x + ghost_position[0], y + ghost_position[1], BLOCK_SIZE)
 
+def draw_ghost_block(self, ghost_surface, color, x, y, BLOCK_SIZE):
+    # Draw the transparent block
+    self.screen.blit(ghost_surface, (self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE))
+    
+    # Draw the outline (not transparent)
+    ghost_rect = pygame.Rect(self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE,
+                             BLOCK_SIZE, BLOCK_SIZE)
+    pygame.draw.rect(self.screen, color, ghost_rect, 1)  # Draw outline (thinner than real blocks)
+
+def draw_full_frame(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
+    draw_grid(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+    draw_tetromino(self, self.tetromino_shape, self.tetromino_position, self.tetromino_color, BLOCK_SIZE)
+    draw_next_piece(self, BLOCK_SIZE)
+    draw_held_piece(self, BLOCK_SIZE)
+
+    draw_best_move(self, BLOCK_SIZE)
+    draw_ghost_piece(self, self.tetromino_shape, self.tetromino_position, self.tetromino_color, BLOCK_SIZE)
+    draw_game_info(self)
+    draw_perf_overlay(self, BLOCK_SIZE)
+
+def draw_frame(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
+    # Draw the frame, repainting only what changed since the last one.
+    # Returns the rects that changed, ready for pygame.display.update.
+    scene = get_frame_scene(self, BLOCK_SIZE)
+    previous = getattr(self, 'last_frame_scene', None)
+    self.last_frame_scene = scene
+
+    # Rotation point markers spill across cells, so that debug view always redraws everything
+    if previous is None or scene['show_rotation_points'] or previous['show_rotation_points']:
+        draw_full_frame(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+        return [self.screen.get_rect()]
+
+    dirty_rects = get_dirty_rects(self, previous, scene, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+    for rect in dirty_rects:
+        redraw_region(self, rect, scene, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+    return dirty_rects
+
+def get_frame_scene(self, BLOCK_SIZE):
+    # Everything that decides what a frame looks like, cheap enough to compare every frame
+    position = self.tetromino_position
+    tetromino = [((x + position[0], y + position[1]), self.tetromino_color) for x, y in self.tetromino_shape]
+
+    best_move = frozenset()
+    thinking = False
+    if getattr(self, 'best_move', None):
+        best_position = self.best_move['position']
+        best_move = frozenset((x + best_position[0], y + best_position[1]) for x, y in self.best_move['tetromino_shape'])
+    else:
+        thinking = is_ai_thinking(self)
+
+    ghost_position = self.simulate_instant_drop(self.tetromino_shape, list(position))
+    ghost = frozenset(((x + ghost_position[0], y + ghost_position[1]), self.tetromino_color) for x, y in self.tetromino_shape)
+
+    info = (self.score, self.level, self.fall_speed)
+    overlay = get_perf_overlay_lines(self)
+    return {
+        'board': self.board.zobrist,
+        'cells': [list(row) for row in self.board.colors],
+        'tetromino': tetromino,
+        'best_move': best_move,
+        'thinking': thinking,
+        'ghost': ghost,
+        'next': self.next_tetromino,
+        'hold': self.hold_tetromino,
+        'info': info,
+        'info_rect': get_game_info_rect(self, info),
+        'overlay': overlay,
+        'overlay_rect': get_perf_overlay_rect(self, overlay, BLOCK_SIZE),
+        'show_rotation_points': self.show_rotation_points,
+    }
+
+def get_dirty_rects(self, previous, scene, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
+    dirty_cells = set()
+
+    # Locked blocks that changed
+    if previous['board'] != scene['board']:
+        for y, (old_row, new_row) in enumerate(zip(previous['cells'], scene['cells'])):
+            if old_row != new_row:
+                dirty_cells.update((x, y) for x in range(GRID_WIDTH) if old_row[x] != new_row[x])
+
+    # The falling piece, whose bevel can reach one pixel into the cells to its right and below
+    for (x, y), _ in set(previous['tetromino']) ^ set(scene['tetromino']):
+        dirty_cells.update(((x, y), (x + 1, y), (x, y + 1), (x + 1, y + 1)))
+
+    # Overlays
+    dirty_cells.update(previous['best_move'] ^ scene['best_move'])
+    dirty_cells.update(cell for cell, _ in previous['ghost'] ^ scene['ghost'])
+
+    # Cells just past the grid are kept too, the piece's bevel can spill onto the outline there
+    dirty_rects = [get_cell_rect(self, x, y, BLOCK_SIZE) for x, y in sorted(dirty_cells)]
+
+    if previous['next'] != scene['next']:
+        dirty_rects.append(get_piece_box_rect(self, 'Next', get_next_box_x(self, BLOCK_SIZE), BLOCK_SIZE))
+    if previous['hold'] != scene['hold']:
+        dirty_rects.append(get_piece_box_rect(self, 'Hold', self.play_area_x - 6 * BLOCK_SIZE, BLOCK_SIZE))
+    if previous['thinking'] != scene['thinking']:
+        dirty_rects.append(get_thinking_rect(self, BLOCK_SIZE))
+    if previous['info'] != scene['info']:
+        dirty_rects.append(previous['info_rect'].union(scene['info_rect']))
+    if previous['overlay'] != scene['overlay']:
+        dirty_rects.append(previous['overlay_rect'].union(scene['overlay_rect']))
+
+    return dirty_rects
+
+def get_cell_rect(self, x, y, BLOCK_SIZE):
+    return pygame.Rect(self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+
+def get_piece_box_rect(self, label, box_x, BLOCK_SIZE):
+    # The label above a next/hold box together with the box itself
+    label_rect = pygame.Rect((box_x, self.play_area_y - 2 * BLOCK_SIZE), self.font.size(label))
+    return label_rect.union(pygame.Rect(box_x, self.play_area_y, 5 * BLOCK_SIZE, 5 * BLOCK_SIZE))
+
+def get_game_info_rect(self, info):
+    score, level, fall_speed = info
+    rect = pygame.Rect((self.play_area_x, self.play_area_y - 75), self.font.size(f"Score: {score}"))
+    rect.union_ip(pygame.Rect((self.play_area_x, self.play_area_y - 50), self.font.size(f"Level: {level}")))
+    rect.union_ip(pygame.Rect((self.play_area_x, self.play_area_y - 25), self.font.size(f"Fall Speed: {fall_speed}ms")))
+    return rect
+
+def get_perf_overlay_rect(self, lines, BLOCK_SIZE):
+    rect = pygame.Rect(get_next_box_x(self, BLOCK_SIZE), self.play_area_y + 6 * BLOCK_SIZE, 0, 0)
+    for index, line in enumerate(lines):
+        rect.union_ip(pygame.Rect((rect.x, self.play_area_y + 6 * BLOCK_SIZE + index * 25), self.font.size(line)))
+    return rect
+
+def redraw_region(self, rect, scene, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE):
+    # Repaint one region by drawing, in the full frame's order, only what overlaps it
+    self.screen.set_clip(rect)
+    self.screen.fill(LIGHT_GRAY, rect)
+
+    # Grid cells under the region
+    first_x = max(0, (rect.left - self.play_area_x) // BLOCK_SIZE)
+    last_x = min(GRID_WIDTH - 1, (rect.right - 1 - self.play_area_x) // BLOCK_SIZE)
+    first_y = max(0, (rect.top - self.play_area_y) // BLOCK_SIZE)
+    last_y = min(GRID_HEIGHT - 1, (rect.bottom - 1 - self.play_area_y) // BLOCK_SIZE)
+    for y in range(first_y, last_y + 1):
+        for x in range(first_x, last_x + 1):
+            draw_grid_cell(self, x, y, BLOCK_SIZE)
+    for y in range(first_y, last_y + 1):
+        for x in range(first_x, last_x + 1):
+            draw_grid_line(self, x, y, BLOCK_SIZE)
+    draw_play_area_outline(self, GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE)
+
+    # Falling piece, in shape order so overlapping bevels stack as in a full frame
+    for (x, y), color in scene['tetromino']:
+        block_rect = pygame.Rect(self.play_area_x + x * BLOCK_SIZE, self.play_area_y + y * BLOCK_SIZE, BLOCK_SIZE + 1, BLOCK_SIZE + 1)
+        if block_rect.colliderect(rect):
+            draw_clean_block(self, color, block_rect.topleft, BLOCK_SIZE)
+
+    if rect.colliderect(get_piece_box_rect(self, 'Next', get_next_box_x(self, BLOCK_SIZE), BLOCK_SIZE)):
+        draw_next_piece(self, BLOCK_SIZE)
+    if rect.colliderect(get_piece_box_rect(self, 'Hold', self.play_area_x - 6 * BLOCK_SIZE, BLOCK_SIZE)):
+        draw_held_piece(self, BLOCK_SIZE)
+
+    # Overlays
+    best_move_cells = [cell for cell in scene['best_move'] if get_cell_rect(self, *cell, BLOCK_SIZE).colliderect(rect)]
+    if best_move_cells:
+        best_move_surface = get_overlay_sprite((255, 165, 0), BLOCK_SIZE)
+        for x, y in best_move_cells:
+            draw_best_move_block(self, best_move_surface, x, y, BLOCK_SIZE)
+
+    if scene['thinking'] and rect.colliderect(get_thinking_rect(self, BLOCK_SIZE)):
+        draw_thinking(self, BLOCK_SIZE)
+
+    for (x, y), color in scene['ghost']:
+        if get_cell_rect(self, x, y, BLOCK_SIZE).colliderect(rect):
+            draw_ghost_block(self, get_overlay_sprite(color, BLOCK_SIZE), color, x, y, BLOCK_SIZE)
+
+    if rect.colliderect(scene['info_rect']):
+        draw_game_info(self)
+    if rect.colliderect(scene['overlay_rect']):
+        draw_perf_overlay(self, BLOCK_SIZE)
+
+    self.screen.set_clip(None)
@@ -0,0 +1,570 @@
+import random
+from shape import TETROMINO_DATA
+from brain import Brain
+from board import Board
+from candidate import Candidate, best_candidate
+from placement import get_placement
+from reachability import Reachability, reachable_placements, get_kicks, get_spawn_position
+from cache import MoveCache
+from search import LookaheadSearch
+from stats import BoardStats
+from instrumentation import Instrumentation, DEBUG
+
+# Official Tetris play area dimensions, in blocks. Any board from MIN_GRID_SIZE up can be played.
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+MIN_GRID_SIZE = 4
+
+# Where every new tetromino appears on the official board
+SPAWN_POSITION = get_spawn_position(GRID_WIDTH)
+
+# Gravity: ms per row at level 1, sped up by FALL_SPEED_FACTOR every level down to MIN_FALL_SPEED
+BASE_FALL_SPEED = 500
+FALL_SPEED_FACTOR = 0.85
+MIN_FALL_SPEED = 50
+
+# Points for clearing 1-4 lines with one piece, multiplied by the level
+LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
+
+# Weights the game has always played with
+DEFAULT_WEIGHTS = {
+    'holes_weight': 4.5,
+    'blocks_above_holes_weight': 0,
+    'pillars_weight': 2.0,
+    'max_height_weight': 2,
+    'bumpiness_weight': 0,
+    'blocks_in_rightmost_lane_weight': 0,
+}
+
+# Everything step() accepts, named like the steps generate_move_steps produces
+ACTIONS = (
+    'Move Left',
+    'Move Right',
+    'Rotate Clockwise',
+    'Rotate Counterclockwise',
+    'Soft Drop',
+    'Instant Drop',
+    'Hold',
+)
+
+
+def get_new_bag(rng=random):
+    return rng.sample(list(TETROMINO_DATA.keys()), len(TETROMINO_DATA))
+
+
+def load_vectorized():
+    # The NumPy batch evaluator module, or None without NumPy. It's only imported when an engine asks for it,
+    # since importing NumPy would otherwise be most of the time it takes to import the engine.
+    import vectorized
+    return vectorized if vectorized.is_available() else None
+
+
+def get_fall_speed(level):
+    return max(MIN_FALL_SPEED, int(BASE_FALL_SPEED * FALL_SPEED_FACTOR ** (level - 1)))
+
+
+class BlockMatrix:
+    def __init__(self, board):
+        self.board = board
+
+    def count_holes(self):
+        holes = 0
+        full_row = self.board.full_row
+        blocks_seen = 0  # Columns where a block has been found so far
+        for row in self.board.rows:  # Walk down the rows, one bitmask per row
+            holes += (blocks_seen & ~row & full_row).bit_count()  # Empty cells below a block
+            blocks_seen |= row
+        return holes
+
+    def count_pillars(self):
+        pillar_holes = 0
+        full_row = self.board.full_row
+
+        # All columns except the first and last (since they can't have holes with blocks on both sides)
+        inner_columns = full_row & ~1 & ~(1 << (self.board.width - 1))
+
+        # Columns currently inside a hole of depth >= 1, >= 2 and >= 3
+        depth_1 = depth_2 = depth_3 = 0
+
+        for row in self.board.rows:
+            # Empty cells with a block on both the left and right sides
+            flanked = ~row & (row << 1) & (row >> 1) & inner_columns
+
+            # A block ends a valid hole (3 or more blocks deep)
+            pillar_holes += (depth_3 & row).bit_count()
+
+            # Extend the holes that continue in this row, anything else resets its tracking
+            depth_3 = depth_2 & flanked
+            depth_2 = depth_1 & flanked
+            depth_1 = flanked
+
+        # Check if the column ends with a valid hole
+        pillar_holes += depth_3.bit_count()
+
+        return pillar_holes
+
+    def calculate_maximum_line_height(self, tetromino, position):
+        max_y = 0
+        for x, y in tetromino:
+            # Calculate the global Y position of each block in the tetromino
+            global_y = y + position[1]
+            # Update max_y if the current block is higher (greater Y value)
+            if global_y > max_y:
+                max_y = global_y
+        finalY= self.board.height-max_y
+        return finalY
+
+    def calculate_bumpiness(self):
+        bumpiness = 0
+        heights = self.calculate_column_heights()
+        for i in range(len(heights) - 1):
+            bumpiness += abs(heights[i] - heights[i + 1])
+        return bumpiness
+
+    def calculate_column_heights(self):
+        return self.board.column_heights()
+
+    def calculate_column_height(self, col):
+        column_bit = 1 << col
+        for row_index, row in enumerate(self.board.rows):
+            if row & column_bit:
+                return self.board.height - row_index  # Return height from the bottom
+        return 0  # No blocks found in the column
+
+    def count_number_of_blocks_in_rightmost_lane(self):
+        rightmost_col = self.board.width - 1
+        return sum((row >> rightmost_col) & 1 for row in self.board.rows)
+
+    def count_blocks_above_holes(self):
+        blocks_above_holes = 0
+        full_row = self.board.full_row
+        holes_seen = 0  # Columns where an empty cell has been found so far
+
+        for row in self.board.rows:
+            blocks_above_holes += (row & holes_seen).bit_count()  # Block found after an empty cell
+            holes_seen |= ~row & full_row
+
+        return blocks_above_holes
+
+    def calculate_lines_cleared(self, board):
+        return board.count_full_rows()
+
+
+class TetrisEngine:
+    # The game rules, bag, hold, scoring, levels and AI, with no pygame dependency.
+    # Drive it with step(action); the same seed and actions always give the same game.
+    def __init__(self, seed=None, weights=None, vectorized=False, search_depth=1, beam_width=None, move_cache=None,
+                 instrumentation=None, ai=True, width=GRID_WIDTH, height=GRID_HEIGHT):
+        # Logging, counters and timings, all off unless an Instrumentation turns them on
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation
+
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+        self.brain = Brain(**weights)
+
+        # Score all candidate placements as one NumPy batch (needs NumPy, otherwise the scalar path is used).
+        # The lookahead search batches every ply it expands the same way.
+        self.evaluator = load_vectorized() if vectorized else None
+        self.vectorized = self.evaluator is not None
+
+        # Look ahead at the next piece and the hold slot when searching deeper than one placement
+        self.search = None
+        if search_depth > 1 or beam_width is not None:
+            self.search = LookaheadSearch(self.brain, depth=search_depth, beam_width=beam_width, evaluator=self.evaluator)
+
+        # Best moves memoized by board hash and pieces. Pass a MoveCache to share one between games,
+        # or False to turn it off.
+        if move_cache is None:
+            move_cache = MoveCache()
+        self.move_cache = move_cache if move_cache is not False else None
+
+        # Choose a best move for every piece. Replays only need the rules and turn this off.
+        self.ai = ai
+
+        # Called with every action step() applies, see replay.ReplayRecorder
+        self.recorder = None
+
+        self.hold_used = False
+        self.game_over = False
+
+        # A private random generator so a seed reproduces the whole sequence of bags.
+        # Without a seed one is drawn at random, and kept so the game can still be replayed.
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        if width < MIN_GRID_SIZE or height < MIN_GRID_SIZE:
+            raise ValueError(f"The board has to be at least {MIN_GRID_SIZE}x{MIN_GRID_SIZE}: {width}x{height}")
+        self.board = Board(width, height)
+        self.spawn_position = get_spawn_position(width)
+        self.score = 0
+        self.level = 1
+        self.total_lines_cleared = 0 
+        self.fall_speed = get_fall_speed(self.level)
+        self.bag = get_new_bag(self.random)
+        
+        # Initialize current and next tetromino
+        self.rotation = 0
+        self.current_tetromino = self.get_next_tetromino()
+        self.next_tetromino = self.get_next_tetromino()
+        
+        # Now set the color, shape and position based on the current tetromino
+        tetromino_data = TETROMINO_DATA[self.current_tetromino]
+        self.tetromino_color = tetromino_data['color']
+        self.tetromino_shape = tetromino_data['rotations'][self.rotation]
+        self.tetromino_position = list(self.spawn_position)
+
+        # Initialize other game variables
+        self.hold_tetromino = None
+        self.pieces_placed = 0
+        self.best_move = None
+
+        # Initialize the BlockMatrix with the current board
+        self.blockMatrix = BlockMatrix(self.board)
+
+        # Statistics kept up to date on every lock and line clear
+        self.stats = BoardStats(self.board)
+
+        self.possible_moves = self.generate_moves_for_current_piece()
+
+    def step(self, action):
+        # Apply one action to the current tetromino, returns False once the game is over
+        if self.game_over:
+            return False
+
+        if action == 'Move Left':
+            self.move(-1)
+        elif action == 'Move Right':
+            self.move(1)
+        elif action == 'Rotate Clockwise':
+            self.tetromino_shape = self.rotate(self.tetromino_shape, self.tetromino_position, clockwise=True)
+        elif action == 'Rotate Counterclockwise':
+            self.tetromino_shape = self.rotate(self.tetromino_shape, self.tetromino_position, clockwise=False)
+        elif action == 'Soft Drop':
+            self.soft_drop()
+        elif action == 'Instant Drop':
+            if not self.instant_drop(self.tetromino_shape, self.tetromino_position):
+                self.game_over = True
+        elif action == 'Hold':
+            hold_available = not self.hold_used
+            self.tetromino_color, self.tetromino_shape = self.perform_hold()
+            if hold_available:
+                self.tetromino_position = list(self.spawn_position)
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+        if self.recorder is not None:
+            self.recorder.record(action)
+        return not self.game_over
+
+    def move(self, dx):
+        self.tetromino_position[0] += dx
+        if self.check_collision(self.tetromino_shape, self.tetromino_position):
+            self.tetromino_position[0] -= dx
+
+    def soft_drop(self):
+        # Move the piece down one row (gravity or the down key), locking it if it cannot move
+        self.tetromino_position[1] += 1
+        if self.check_collision(self.tetromino_shape, self.tetromino_position):
+            self.tetromino_position[1] -= 1
+            self.lock_tetromino(self.tetromino_shape, self.tetromino_position, self.tetromino_color)
+            self.spawn_next_tetromino()
+
+    def spawn_next_tetromino(self):
+        # Reset tetromino position, color, and shape for the next piece
+        self.hold_used = False  # Allow holding again for the next piece
+        self.current_tetromino = self.next_tetromino
+        self.next_tetromino = self.get_next_tetromino()
+        
+        # Reset rotation to 0 for the new tetromino
+        self.rotation = 0
+        
+        # Ensure the new tetromino uses the correct shape and color
+        self.tetromino_color = TETROMINO_DATA[self.current_tetromino]['color']
+        self.tetromino_shape = TETROMINO_DATA[self.current_tetromino]['rotations'][self.rotation]
+        self.tetromino_position = list(self.spawn_position)
+
+        # Check if the new piece immediately collides (game over condition)
+        if self.check_collision(self.tetromino_shape, self.tetromino_position):
+            self.game_over = True
+            return False
+
+        # Generate possible moves for the new piece
+        self.generate_moves_for_current_piece()
+        return True
+
+    def generate_possible_moves(self, tetromino, initial_position, rotation=0):
+        # Every resting placement the tetromino can be steered to from initial_position: straight drops,
+        # and slides and spins under overhangs, as Candidate records in the move generator's order
+        placements = reachable_placements(self.board, tetromino, initial_position, rotation)
+        return list(self.score_placements(placements))
+
+    def score_placements(self, placements):
+        # A Candidate for every (placement, col, row), yielded one at a time so the greedy choice never
+        # holds more than the best one
+        if self.vectorized:
+            # Same weights, in the same order, as the scalar path
+            _, weights = self.evaluator.evaluate_placements(self.board, placements, self.brain)
+            for (placement, col, row), weight in zip(placements, weights.tolist()):
+                yield Candidate(weight, placement, col, row)
+            return
+
+        for placement, col, row in placements:
+            # Preview the statistics from the columns the tetromino touches
+            features = self.stats.preview(placement.cells, (col, row))
+            yield Candidate(self.brain.compute_weight(*features), placement, col, row)
+
+    def materialize_move(self, tetromino, candidate):
+        # The move dict for a chosen candidate, with the feature values the rest of the game reads.
+        # The resulting board is built on demand by build_move_board.
+        features = self.stats.preview(candidate.cells, (candidate.col, candidate.row))
+        holes, blocks_above_holes, pillars, max_height, bumpiness = features[:5]
+        return {
+            'tetromino': tetromino,
+            'rotation': candidate.rotation,
+            'position': candidate.position,
+            'tetromino_shape': candidate.cells,
+            'holes': holes,
+            'pillars': pillars,
+            'max_height': max_height,
+            'bumpiness': bumpiness,
+            'blocks_above_holes': blocks_above_holes,
+            'weight': candidate.weight
+        }
+
+    def build_move_board(self, move):
+        # Build the board a move would leave behind, only when someone actually needs it
+        board = self.board.copy()
+        board.place(move['tetromino_shape'], move['position'], TETROMINO_DATA[move['tetromino']]['color'])
+        return board
+        
+    def instant_drop(self, tetromino_shape, tetromino_position):
+        # Drop the piece straight to its landing row
+        self.simulate_instant_drop(tetromino_shape, tetromino_position)
+
+        # Once it collides, lock the piece in place, clearing any lines it completes
+        self.lock_tetromino(tetromino_shape, tetromino_position, TETROMINO_DATA[self.current_tetromino]['color'])
+        
+        # Bring in the next piece, the caller's position is reset along with it
+        playing = self.spawn_next_tetromino()
+        tetromino_position[0], tetromino_position[1] = self.tetromino_position
+        return playing
+
+    def simulate_instant_drop(self, tetromino_shape, tetromino_position):
+        # The stats' column heights are kept up to date, so the landing row costs O(piece width)
+        placement = get_placement(tetromino_shape)
+        drop_row = placement.landing_row(self.board, tetromino_position[0], tetromino_position[1], self.stats.heights)
+        if drop_row is not None:
+            tetromino_position[1] = drop_row
+        return tetromino_position
+
+    def generate_moves_for_current_piece(self):
+        if not self.ai:
+            self.best_move = None
+            return
+
+        with self.instrumentation.timer('move_generation'):
+            if self.move_cache is None:
+                return self.choose_best_move()
+
+            # The same board, pieces and weights always give the same move
+            cache_key = self.move_cache_key()
+            cached = self.move_cache.get(cache_key)
+            if cached is not None:
+                best_move, score = cached
+                self.best_move = dict(best_move, position=list(best_move['position']))
+                self.instrumentation.count('move_cache_hits')
+                self.instrumentation.debug("Best Move (cached): Rotation: %s, Position: %s, Score: %s",
+                                           best_move['rotation'], best_move['position'], score)
+                return
+
+            self.instrumentation.count('move_cache_misses')
+            self.choose_best_move()
+            if self.best_move is not None:
+                score = self.best_move.get('search_value', self.best_move['weight'])
+                self.move_cache.put(cache_key, dict(self.best_move, position=list(self.best_move['position'])), score)
+
+    def move_cache_key(self):
+        weights = tuple(self.brain.get_weights().values())
+        if self.search is None:
+            # The greedy choice only depends on the board and the current piece
+            return (self.board.zobrist, self.current_tetromino, weights)
+        return (self.board.zobrist, self.current_tetromino, self.next_tetromino, self.hold_tetromino,
+                self.hold_used, weights, self.search.depth, self.search.beam_width)
+
+    def choose_best_move(self):
+        if self.search is not None:
+            return self.search_moves_for_current_piece()
+
+        # Score every placement of the current tetromino from the spawn, keeping only the best so far
+        placements = reachable_placements(self.board, self.current_tetromino, self.spawn_position)
+        self.instrumentation.count('candidates_evaluated', len(placements))
+        best = best_candidate(self.score_placements(placements))
+
+        if best is None:
+            self.best_move = None  # Don't leave the previous piece's move behind
+            return  # No possible moves, exit early
+
+        # Only the winner is turned into a full move
+        self.best_move = self.materialize_move(self.current_tetromino, best)
+        self.instrumentation.debug("Best Move: Rotation: %s, Position: %s, Weight: %s",
+                                   best.rotation, self.best_move['position'], best.weight)
+
+        # The steps to execute the best move are only worked out here to be logged
+        if self.instrumentation.is_enabled(DEBUG):
+            self.instrumentation.debug("Steps to Best Move: %s", self.generate_move_steps())
+
+    def search_moves_for_current_piece(self):
+        # Pick the move with the lookahead search, which may play the hold piece instead
+        nodes = self.search.nodes
+        result = self.search.search(self.board, self.current_tetromino, self.next_tetromino,
+                                    self.hold_tetromino, not self.hold_used)
+        self.instrumentation.count('candidates_evaluated', self.search.nodes - nodes)
+        self.instrumentation.debug("Search: %.1f ms, Nodes: %d, Table hit rate: %.1f%%",
+                                   self.search.last_search_ms, self.search.nodes, self.search.hit_rate() * 100)
+
+        if result is None:
+            self.best_move = None  # Don't leave the previous piece's move behind
+            return  # No possible moves, exit early
+
+        value, use_hold, tetromino, candidate = result
+        self.best_move = self.materialize_move(tetromino, candidate)
+        self.best_move['hold'] = use_hold  # Swap with the hold slot before placing
+        self.best_move['search_value'] = value
+        self.instrumentation.debug("Best Move: Rotation: %s, Position: %s, Hold: %s, Value: %s",
+                                   candidate.rotation, self.best_move['position'], use_hold, value)
+
+    def generate_move_steps(self):
+        # The shortest list of step() inputs that puts the current piece where the best move wants it
+        if not hasattr(self, 'best_move') or not self.best_move:
+            return []  # No best move available
+
+        # Swap with the hold slot first if the move plays the held piece, which comes in at the spawn unrotated
+        steps = []
+        tetromino, position, rotation = self.current_tetromino, self.tetromino_position, self.rotation
+        if self.best_move.get('hold') and not self.hold_used:
+            steps.append('Hold')
+            tetromino, position, rotation = self.best_move['tetromino'], self.spawn_position, 0
+
+        reachability = Reachability(self.board, tetromino, position, rotation)
+        path = reachability.path(self.best_move['rotation'], *self.best_move['position'])
+        if path is None:
+            return []  # The piece was moved somewhere the best move can't be reached from
+        return steps + path
+
+    def play_best_move(self):
+        # Play every step of the best move, or drop the piece where it is when there's no way to get it there.
+        # Returns False once the game is over.
+        for step in self.generate_move_steps() or ['Instant Drop']:
+            if not self.step(step):
+                return False
+        return True
+
+    def rotate(self, tetromino, position, clockwise=True):
+        # Get the current shape rotations from SHAPES
+        shape_rotations = TETROMINO_DATA[self.current_tetromino]['rotations']
+        
+        # Determine the new rotation index
+        if clockwise:
+            new_rotation = (self.rotation + 1) % len(shape_rotations)  # Cycle forward
+        else:
+            new_rotation = (self.rotation - 1) % len(shape_rotations)  # Cycle backward
+        
+        # Get the new rotated tetromino shape based on the new rotation index
+        rotated_tetromino = shape_rotations[new_rotation]
+
+        # Take the first kick where the rotated tetromino doesn't collide with anything, moving the piece by it
+        for dx, dy in get_kicks(self.current_tetromino):
+            kicked_position = [position[0] + dx, position[1] + dy]
+            if not self.check_collision(rotated_tetromino, kicked_position):
+                self.rotation = new_rotation
+                position[0], position[1] = kicked_position
+                return rotated_tetromino
+        return tetromino  # Return the original shape if it collides with every kick
+
+    def get_next_tetromino(self):
+        if len(self.bag) == 0:
+            self.bag = get_new_bag(self.random)
+        return self.bag.pop(0)
+
+    def check_collision(self, tetromino, position):
+        return self.board.collides(tetromino, position)
+    
+    def perform_hold(self):
+        if not self.hold_used:
+            if self.hold_tetromino is None:
+                # First time holding, swap current tetromino with next
+                self.hold_tetromino = self.current_tetromino
+                self.current_tetromino = self.next_tetromino
+                self.next_tetromino = self.get_next_tetromino()
+            else:
+                # Swap the held tetromino with the current one
+                self.current_tetromino, self.hold_tetromino = self.hold_tetromino, self.current_tetromino
+            
+            self.hold_used = True
+            self.rotation = 0  # Reset rotation when holding a new piece
+            
+            # Generate moves for the held piece
+            self.generate_moves_for_current_piece()
+
+            # Always return the new tetromino color and shape
+            return TETROMINO_DATA[self.current_tetromino]['color'], TETROMINO_DATA[self.current_tetromino]['rotations'][self.rotation]
+
+        
+        # If hold was already used in this round, return the current color and shape to avoid NoneType
+        return TETROMINO_DATA[self.current_tetromino]['color'], TETROMINO_DATA[self.current_tetromino]['rotations'][self.rotation]
+
+    def lock_tetromino(self, tetromino, position, color):
+        # Place the piece, then clear and score the lines it completed. The next piece's move is
+        # chosen when it spawns.
+        with self.instrumentation.timer('lock'):
+            self.board.place(tetromino, position, color)
+            self.stats.lock(tetromino, position)
+            self.pieces_placed += 1
+            self.instrumentation.count('pieces')
+
+            # Only the rows the piece landed on can have filled up
+            lines_cleared = self.clear_lines({y + position[1] for _, y in tetromino})
+
+            # After locking the tetromino, log the grid state analysis kept by the statistics
+            if self.instrumentation.is_enabled(DEBUG):
+                holes = self.stats.total_holes()
+                pillars = self.stats.total_pillars()
+                max_height = self.blockMatrix.calculate_maximum_line_height(tetromino, position)
+                bumpiness = self.stats.bumpiness()
+                blocks_in_rightmost_lane = self.stats.blocks_in_rightmost_lane()
+                self.instrumentation.debug("Holes: %s, Pillars: %s, Max Height: %s, Bumpiness: %s, Rightmost Lane Blocks: %s",
+                                           holes, pillars, max_height, bumpiness, blocks_in_rightmost_lane)
+                self.instrumentation.debug("Lines cleared by the piece: %s", lines_cleared)
+
+    def clear_lines(self, rows=None):
+        # Clear the full rows among `rows` (all of them if None), score them and update the level.
+        # Returns the number of lines cleared.
+        cleared_rows = self.board.clear_full_rows(rows)
+        if not cleared_rows:
+            return 0
+        self.stats.clear_rows(cleared_rows)
+        lines_cleared = len(cleared_rows)
+
+        # Scored at the level the lines were cleared on
+        self.score += LINE_SCORES[lines_cleared] * self.level
+
+        # Add cleared lines to the total
+        self.total_lines_cleared += lines_cleared
+        self.update_level()  # Check if the level should increase
+
+        self.instrumentation.count('lines', lines_cleared)
+        self.instrumentation.info("Lines cleared: %s, Total lines cleared: %s, Score: %s, Level: %s",
+                                  lines_cleared, self.total_lines_cleared, self.score, self.level)
+        return lines_cleared
+    
+    def update_level(self):
+        # Increase the level every 10 lines cleared
+        level = self.total_lines_cleared // 10 + 1
+        if level != self.level:
+            self.instrumentation.info("Level updated: %s", level)
+        self.level = level
+        self.fall_speed = get_fall_speed(self.level)
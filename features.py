@@ -0,0 +1,10 @@
+# Order matches the arguments of Brain.compute_weight, so a feature vector can be passed as *features
+FEATURE_NAMES = (
+    'holes',
+    'blocks_above_holes',
+    'pillars',
+    'max_height',
+    'bumpiness',
+    'blocks_in_rightmost_lane',
+    'lines_cleared',
+)
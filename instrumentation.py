@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import time
+
+# Log levels, a message is written when its level is at least the instrumentation's level
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+
+# Upper bounds (ms) of the timing histogram buckets, anything slower lands in a final overflow bucket
+TIMING_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Environment variables read by Instrumentation.from_environment
+LOG_LEVEL_VARIABLE = 'TETRIS_LOG_LEVEL'
+METRICS_VARIABLE = 'TETRIS_METRICS'
+
+
+def metrics_to_lines(metrics, **extra):
+    # One JSON-ready record per counter and per timing of a get_metrics() dict, each tagged with the extra fields
+    records = [dict(extra, type='counter', name=name, value=value) for name, value in sorted(metrics['counters'].items())]
+    records += [dict(extra, type='timing', name=name, **timing) for name, timing in sorted(metrics['timings'].items())]
+    return records
+
+
+def write_metrics(path, records):
+    # Append records to a JSON lines file
+    with open(path, 'a') as metrics_file:
+        for record in records:
+            metrics_file.write(json.dumps(record) + '\n')
+
+
+class Histogram:
+    # Bucketed timings, cheap to record and small enough to export for every run
+    def __init__(self, buckets=TIMING_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        # Add another histogram's timings, recorded with the same buckets
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        # Upper bound of the bucket holding the percentile (the maximum for the overflow bucket)
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total,
+            'mean_ms': self.mean(),
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': list(self.buckets),
+            'counts': list(self.counts),
+        }
+
+
+class Timer:
+    # Context manager recording its duration into a histogram
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class NullTimer:
+    # Stands in for Timer when metrics are off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Instrumentation:
+    # Log messages, counters and timing histograms for one game.
+    # Both halves default to off, and then every call returns straight away: log messages are
+    # %-formatted only when written and timers are a shared no-op.
+    def __init__(self, log_level=OFF, metrics=False, stream=None):
+        self.log_level = log_level
+        self.metrics = metrics
+        self.stream = stream
+        self.counters = {}
+        self.timings = {}
+
+    @classmethod
+    def from_environment(cls, environ=os.environ):
+        # TETRIS_LOG_LEVEL=debug|info|warning|error turns logging on, TETRIS_METRICS=<path> turns metrics on
+        log_level = LEVELS[environ.get(LOG_LEVEL_VARIABLE, 'off').lower()]
+        return cls(log_level=log_level, metrics=bool(environ.get(METRICS_VARIABLE)))
+
+    # Logging
+
+    def is_enabled(self, level):
+        return level >= self.log_level
+
+    def log(self, level, message, *args):
+        if level < self.log_level:
+            return
+        if args:
+            message = message % args
+        print(message, file=self.stream if self.stream is not None else sys.stderr)
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    # Metrics
+
+    def count(self, name, amount=1):
+        if self.metrics:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timer(self, name):
+        if not self.metrics:
+            return NULL_TIMER
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = Histogram()
+        return Timer(histogram)
+
+    def get_metrics(self):
+        return {
+            'counters': dict(self.counters),
+            'timings': {name: histogram.to_dict() for name, histogram in self.timings.items()},
+        }
+
+    def merge(self, other):
+        # Add another instrumentation's counters and timings, e.g. those of a worker thread
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name, histogram in other.timings.items():
+            if name not in self.timings:
+                self.timings[name] = Histogram(histogram.buckets)
+            self.timings[name].merge(histogram)
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+
+    def export_jsonl(self, path, **extra):
+        # Append this run's metrics to a JSON lines file
+        write_metrics(path, metrics_to_lines(self.get_metrics(), **extra))
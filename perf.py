@@ -0,0 +1,84 @@
+import collections
+import cProfile
+import time
+
+# The overlay text is refreshed this often (seconds) so it stays readable and doesn't force a repaint every frame
+OVERLAY_REFRESH = 0.25
+
+# Frames averaged by the overlay
+FRAME_SAMPLES = 60
+
+
+def get_ai_ms(instrumentation):
+    # Total time spent choosing moves so far
+    histogram = instrumentation.timings.get('move_generation')
+    return histogram.total if histogram is not None else 0.0
+
+
+class FrameStats:
+    # Rolling frame timings (ms) split into simulate/AI/render, and the overlay lines made from them
+    def __init__(self, samples=FRAME_SAMPLES):
+        self.frames = collections.deque(maxlen=samples)
+        self.lines = ()
+        self.last_refresh = 0.0
+
+    def add_frame(self, simulate, ai, render):
+        self.frames.append((simulate, ai, render))
+
+    def averages(self):
+        if not self.frames:
+            return 0.0, 0.0, 0.0
+        count = len(self.frames)
+        return tuple(sum(frame[part] for frame in self.frames) / count for part in range(3))
+
+    def refresh(self, fps, instrumentation, now=None):
+        # Rebuild the overlay lines at most every OVERLAY_REFRESH seconds
+        now = time.perf_counter() if now is None else now
+        if now - self.last_refresh < OVERLAY_REFRESH:
+            return self.lines
+        self.last_refresh = now
+
+        simulate, ai, render = self.averages()
+        pieces = instrumentation.counters.get('pieces', 0)
+        candidates = instrumentation.counters.get('candidates_evaluated', 0)
+        self.lines = (
+            f"FPS: {fps:.0f}",
+            f"Simulate: {simulate:.2f}ms",
+            f"AI: {ai:.2f}ms",
+            f"Render: {render:.2f}ms",
+            f"AI per piece: {get_ai_ms(instrumentation) / pieces if pieces else 0.0:.2f}ms",
+            f"Candidates: {candidates}",
+        )
+        return self.lines
+
+
+class Profiler:
+    # cProfile around the game loop, started and stopped while the game runs.
+    # Every stop writes a pstats file to `path`, or to a timestamped file when there is none.
+    def __init__(self, path=None):
+        self.path = path
+        self.profile = None
+
+    def is_running(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self):
+        # Returns the file the stats were written to
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        path = self.path or time.strftime('tetris-%Y%m%d-%H%M%S.prof')
+        self.profile.dump_stats(path)
+        self.profile = None
+        return path
+
+    def toggle(self):
+        if self.is_running():
+            return self.stop()
+        self.start()
+        return None
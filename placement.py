@@ -0,0 +1,82 @@
+from shape import TETROMINO_DATA
+
+
+class PiecePlacement:
+    # Geometry of one (piece, rotation), precomputed once so move generation and drops
+    # never have to rescan the cell list.
+    def __init__(self, tetromino, rotation, cells):
+        self.tetromino = tetromino
+        self.rotation = rotation
+        self.cells = cells
+        self.min_x = min(x for x, _ in cells)
+        self.max_x = max(x for x, _ in cells)
+        self.max_y = max(y for _, y in cells)
+
+        # Bottom profile: the lowest cell of every column the piece covers, as (x, y) offsets
+        bottom = {}
+        for x, y in cells:
+            if y > bottom.get(x, -1):
+                bottom[x] = y
+        self.bottom = sorted(bottom.items())
+
+        # Cell masks per row, with bit 0 at min_x so a mask can be shifted into place by (column + min_x)
+        masks = {}
+        for x, y in cells:
+            masks[y] = masks.get(y, 0) | (1 << (x - self.min_x))
+        self.row_masks = sorted(masks.items())
+
+        # The same per row as the columns of the cells, relative to min_x
+        self.row_columns = [(dy, tuple(x for x in range(mask.bit_length()) if mask >> x & 1)) for dy, mask in self.row_masks]
+
+    def columns(self, width):
+        # Every column the piece origin can take without leaving the board
+        return range(-self.min_x, width - self.max_x)
+
+    def collides(self, board, x, y):
+        if x < -self.min_x or x + self.max_x >= board.width:
+            return True
+        shift = x + self.min_x
+        rows = board.rows
+        for dy, mask in self.row_masks:
+            grid_y = y + dy
+            if grid_y >= board.height:
+                return True
+            if grid_y >= 0 and rows[grid_y] & (mask << shift):
+                return True
+        return False
+
+    def landing_row(self, board, x, y=0, heights=None):
+        # Row where the piece comes to rest when dropped straight down from (x, y), or None if it
+        # already collides there. Column heights give the answer in O(piece width).
+        if x + self.min_x < 0 or x + self.max_x >= board.width:
+            return None  # Partly off the side of the board
+        if heights is None:
+            heights = board.column_heights()
+        height = board.height
+        landing = min(height - heights[x + dx] - 1 - dy for dx, dy in self.bottom)
+        if landing >= y:
+            return landing
+
+        # The piece is under an overhang (or blocked): probe down row by row
+        if self.collides(board, x, y):
+            return None
+        while not self.collides(board, x, y + 1):
+            y += 1
+        return y
+
+
+PLACEMENTS = {
+    tetromino: [PiecePlacement(tetromino, rotation, cells) for rotation, cells in enumerate(data['rotations'])]
+    for tetromino, data in TETROMINO_DATA.items()
+}
+
+# Lookup by cell list, for callers that only hold a shape
+PLACEMENT_BY_SHAPE = {
+    tuple(placement.cells): placement
+    for rotations in PLACEMENTS.values()
+    for placement in rotations
+}
+
+
+def get_placement(tetromino_shape):
+    return PLACEMENT_BY_SHAPE[tuple(tetromino_shape)]
@@ -0,0 +1,250 @@
+from placement import PLACEMENTS
+
+# Offsets tried in order when a rotated tetromino collides where it is, the first one that fits is taken.
+# There are no upward kicks, so a piece can never be lifted back above the row it spawned on.
+KICKS = ((0, 0), (-1, 0), (1, 0), (0, 1))
+I_KICKS = ((0, 0), (-1, 0), (1, 0), (-2, 0), (2, 0), (0, 1))
+
+
+# Spare bits after every row of a state bitset, so shifting a state sideways can never wrap into the next row
+GUARD_BITS = 8
+
+
+def get_kicks(tetromino):
+    return I_KICKS if tetromino == 'I' else KICKS
+
+
+def get_spawn_position(width):
+    # Where every new tetromino appears: the middle of the top row, (4, 0) on a 10-wide board.
+    # On the narrowest boards it moves left so every tetromino's first rotation still fits.
+    widest = max(placements[0].max_x for placements in PLACEMENTS.values())
+    return (max(0, min(width // 2 - 1, width - 1 - widest)), 0)
+
+
+def flood(states, free, shift, length):
+    # Every state reachable from `states` by repeating one move any number of times through free states,
+    # as an occluded fill: log2(length) rounds of shifts, each doubling the distance covered.
+    # The move shifts a state's bit by `shift` (negative for towards bit 0).
+    propagate = free
+    distance = 1
+    while distance < length:
+        if shift > 0:
+            states |= propagate & (states << shift)
+            propagate &= propagate << shift
+        else:
+            states |= propagate & (states >> -shift)
+            propagate &= propagate >> -shift
+        shift *= 2
+        distance *= 2
+    return states
+
+
+class Reachability:
+    # Every (rotation, x, y) a tetromino can be steered to from where it is with the step() inputs.
+    # States are kept as one bitset per rotation: bit (y * stride + leftmost column) is set if the piece
+    # fits there, so whole sets of states are moved at once with shifts and masks.
+    def __init__(self, board, tetromino, position, rotation=0):
+        self.board = board
+        self.tetromino = tetromino
+        self.placements = PLACEMENTS[tetromino]
+        self.kicks = get_kicks(tetromino)
+        self.stride = board.width + GUARD_BITS
+        top = next((y for y, row in enumerate(board.rows) if row), board.height)
+        self.free = [self.fit_mask(placement, top) for placement in self.placements]
+        self.position = position
+        self.rotation = rotation
+        self.visited = None  # Filled in the first time the placements are asked for
+
+    def fit_mask(self, placement, top):
+        # Bitset of the states where the rotation fits on the board, `top` being the highest row with a block
+        board = self.board
+        rows = board.rows
+        span = placement.max_x - placement.min_x
+        row_range = (1 << (board.width - span)) - 1
+
+        # Above the stack the piece fits anywhere between the walls: repeat the row range with one multiply
+        clear = max(0, min(top, board.height) - placement.max_y)
+        free = row_range * (((1 << (clear * self.stride)) - 1) // ((1 << self.stride) - 1))
+        for y in range(clear, board.height - placement.max_y):
+            blocked = 0
+            for dy, columns in placement.row_columns:
+                row = rows[y + dy]
+                if row:
+                    for x in columns:
+                        blocked |= row >> x
+            free |= (~blocked & row_range) << (y * self.stride)
+        return free
+
+    def fill(self):
+        # Every reachable state: slide and drop each rotation as far as it goes, then rotate everything found,
+        # until a pass adds nothing
+        width = self.board.width
+        height = self.board.height
+        stride = self.stride
+        free = self.free
+        visited = self.visited = [0] * len(self.placements)
+        start_bit = self.state_bit(self.rotation, self.position[0], self.position[1])
+        if start_bit is None:
+            return visited
+        visited[self.rotation] = start_bit
+        grown = [self.rotation]
+        while grown:
+            for rotation in grown:
+                fits = free[rotation]
+                states = visited[rotation]
+                while True:
+                    states = flood(states, fits, 1, width)
+                    states = flood(states, fits, -1, width)
+                    dropped = flood(states, fits, stride, height)
+                    # Done unless something that fell can slide somewhere new (a tuck)
+                    fallen = dropped & ~states
+                    states = dropped
+                    if not ((fallen >> 1) | (fallen << 1)) & fits & ~states:
+                        break
+                visited[rotation] = states
+            rotated = [0] * len(visited)
+            for rotation in grown:
+                for target, _ in self.rotation_targets(rotation):
+                    rotated[target] |= self.rotate_states(visited[rotation], rotation, target)
+            grown = []
+            for target, states in enumerate(rotated):
+                if states & ~visited[target]:
+                    visited[target] |= states
+                    grown.append(target)
+        return visited
+
+    def state_bit(self, rotation, x, y):
+        # The bit of a state, or None if the tetromino doesn't fit there
+        if y < 0:
+            return None
+        column = x + self.placements[rotation].min_x
+        if column < 0 or column >= self.board.width:
+            return None
+        bit = 1 << (y * self.stride + column)
+        return bit if self.free[rotation] & bit else None
+
+    def rotation_shift(self, rotation, target, dx, dy):
+        # How far a state's bit moves when it rotates to `target` with the kick (dx, dy)
+        return self.placements[target].min_x - self.placements[rotation].min_x + dx + dy * self.stride
+
+    def rotate_states(self, states, rotation, target):
+        # States of `target` reached by rotating `states`, each taking the first kick that fits
+        reached = 0
+        remaining = states
+        for dx, dy in self.kicks:
+            if not remaining:
+                break
+            shift = self.rotation_shift(rotation, target, dx, dy)
+            if shift >= 0:
+                landed = (remaining << shift) & self.free[target]
+                remaining &= ~(landed >> shift)
+            else:
+                landed = (remaining >> -shift) & self.free[target]
+                remaining &= ~(landed << -shift)
+            reached |= landed
+        return reached
+
+    def rotation_targets(self, rotation):
+        count = len(self.placements)
+        if count == 1:
+            return ()
+        return ((rotation + 1) % count, 'Rotate Clockwise'), ((rotation - 1) % count, 'Rotate Counterclockwise')
+
+    def resting_placements(self):
+        # (placement, x, y) for every reachable state the piece can't fall from, by rotation, then column,
+        # then row, so in a column the straight drop comes before any tuck under it
+        if self.visited is None:
+            self.fill()
+        resting = []
+        for rotation, placement in enumerate(self.placements):
+            states = self.visited[rotation] & ~(self.free[rotation] >> self.stride)
+            found = []
+            while states:
+                bit = states & -states
+                y, column = divmod(bit.bit_length() - 1, self.stride)
+                found.append((column - placement.min_x, y))
+                states ^= bit
+            found.sort()
+            resting.extend((placement, x, y) for x, y in found)
+        return resting
+
+    def path(self, rotation, x, y):
+        # Shortest list of step() inputs that locks the tetromino at (rotation, x, y), ending with
+        # the Instant Drop. None if it can't get there.
+        target = self.state_bit(rotation, x, y)
+        start = self.state_bit(self.rotation, *self.position)
+        if target is None or start is None:
+            return None
+        if self.free[rotation] & (target << self.stride):
+            return None  # Not a resting state, the drop would carry on past it
+
+        # Any state straight above the target that the piece can fall from ends the path with an Instant Drop
+        drop_from = 0
+        bit = target
+        while bit and self.free[rotation] & bit:
+            drop_from |= bit
+            bit >>= self.stride
+
+        # Breadth first from the start, one input per level, until a level reaches one of those states
+        stride = self.stride
+        free = self.free
+        seen = [0] * len(free)
+        seen[self.rotation] = start
+        levels = [list(seen)]
+        while not levels[-1][rotation] & drop_from:
+            frontier = levels[-1]
+            reached = [0] * len(frontier)
+            for source, states in enumerate(frontier):
+                if states:
+                    # Move Left, Move Right and Soft Drop
+                    reached[source] |= ((states >> 1) | (states << 1) | (states << stride)) & free[source]
+                    for target_rotation, _ in self.rotation_targets(source):
+                        reached[target_rotation] |= self.rotate_states(states, source, target_rotation)
+            for index in range(len(reached)):
+                reached[index] &= ~seen[index]
+                seen[index] |= reached[index]
+            if not any(reached):
+                return None
+            levels.append(reached)
+
+        reached = levels[-1][rotation] & drop_from
+        steps = self.trace(levels, rotation, reached & -reached)
+        steps.append('Instant Drop')
+        return steps
+
+    def trace(self, levels, rotation, bit):
+        # Walk back through the BFS levels to the start state, collecting the inputs on the way
+        steps = []
+        stride = self.stride
+        for previous in reversed(levels[:-1]):
+            # Soft drops and moves are checked first, so rotations end up at the start of the path
+            for source, action in ((bit >> stride, 'Soft Drop'), (bit << 1, 'Move Left'), (bit >> 1, 'Move Right')):
+                if previous[rotation] & source:
+                    bit = source
+                    steps.append(action)
+                    break
+            else:
+                rotation, bit, action = self.rotation_source(rotation, bit, previous)
+                steps.append(action)
+        steps.reverse()
+        return steps
+
+    def rotation_source(self, rotation, bit, previous):
+        # The state in `previous` that rotates onto (rotation, bit)
+        for source_rotation, states in enumerate(previous):
+            if not states:
+                continue
+            for target, action in self.rotation_targets(source_rotation):
+                if target != rotation:
+                    continue
+                for dx, dy in self.kicks:
+                    shift = self.rotation_shift(source_rotation, target, dx, dy)
+                    source = bit >> shift if shift >= 0 else bit << -shift
+                    if states & source and self.rotate_states(source, source_rotation, target) == bit:
+                        return source_rotation, source, action
+        raise ValueError("State was not reached by a rotation")
+
+
+def reachable_placements(board, tetromino, position, rotation=0):
+    # Every resting placement the tetromino can reach from `position` and `rotation`, as (placement, x, y)
+    return Reachability(board, tetromino, position, rotation).resting_placements()
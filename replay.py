@@ -0,0 +1,129 @@
+import argparse
+import json
+import sys
+import time
+from engine import TetrisEngine, ACTIONS, GRID_WIDTH, GRID_HEIGHT
+
+REPLAY_VERSION = 2
+
+# Playback speeds offered in the window, 'max' replays headlessly as fast as possible
+SPEEDS = ('1', '2', '8', 'max')
+
+
+class Replay:
+    # Everything needed to play a game again: the seed, the weight set, the board size and every action
+    # step() applied as (milliseconds since the start, action). The final state is kept to check the playback against.
+    def __init__(self, seed, weights, actions=None, final=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.seed = seed
+        self.weights = weights
+        self.actions = actions if actions is not None else []
+        self.final = final
+        self.width = width
+        self.height = height
+
+    def duration(self):
+        return self.actions[-1][0] if self.actions else 0
+
+    def to_dict(self):
+        # Actions are stored as [ms, index into engine.ACTIONS] pairs to keep the files small
+        return {
+            'version': REPLAY_VERSION,
+            'seed': self.seed,
+            'weights': self.weights,
+            'width': self.width,
+            'height': self.height,
+            'actions': [[ms, ACTIONS.index(action)] for ms, action in self.actions],
+            'final': self.final,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version: {data.get('version')}")
+        actions = [(ms, ACTIONS[index]) for ms, index in data['actions']]
+        return cls(data['seed'], data['weights'], actions, data.get('final'),
+                   data.get('width', GRID_WIDTH), data.get('height', GRID_HEIGHT))
+
+
+def save_replay(replay, path):
+    with open(path, 'w') as replay_file:
+        json.dump(replay.to_dict(), replay_file, separators=(',', ':'))
+
+
+def load_replay(path):
+    with open(path) as replay_file:
+        return Replay.from_dict(json.load(replay_file))
+
+
+def final_state(engine):
+    # What a playback has to reproduce exactly
+    return {
+        'score': engine.score,
+        'lines': engine.total_lines_cleared,
+        'level': engine.level,
+        'game_over': engine.game_over,
+        'rows': list(engine.board.rows),
+    }
+
+
+class ReplayRecorder:
+    # Attached to an engine as engine.recorder, it timestamps every action the engine applies
+    def __init__(self, engine):
+        self.engine = engine
+        self.start = time.perf_counter()
+        self.replay = Replay(engine.seed, engine.brain.get_weights(), width=engine.board.width, height=engine.board.height)
+
+    def record(self, action):
+        self.replay.actions.append((round((time.perf_counter() - self.start) * 1000), action))
+
+    def finish(self):
+        # Stop recording and return the replay with the final state filled in
+        self.engine.recorder = None
+        self.replay.final = final_state(self.engine)
+        return self.replay
+
+
+def record(engine):
+    # Start recording an engine's actions, returns the recorder
+    engine.recorder = ReplayRecorder(engine)
+    return engine.recorder
+
+
+def play_replay(replay):
+    # Re-simulate a replay headlessly as fast as possible. The AI is off, the actions decide everything.
+    engine = TetrisEngine(seed=replay.seed, weights=replay.weights, move_cache=False, ai=False,
+                          width=replay.width, height=replay.height)
+    for _, action in replay.actions:
+        engine.step(action)
+    return engine
+
+
+def verify_replay(replay):
+    # True if playing the replay ends on the recorded final board and score
+    return final_state(play_replay(replay)) == replay.final
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play back a recorded game.')
+    parser.add_argument('replay', help='replay file written by the game (TETRIS_RECORD) or selfplay --record-dir')
+    parser.add_argument('--speed', choices=SPEEDS, default='max', help='playback speed in the window, or max for headless')
+    args = parser.parse_args(argv)
+
+    replay = load_replay(args.replay)
+    if args.speed == 'max':
+        start = time.perf_counter()
+        engine = play_replay(replay)
+        seconds = time.perf_counter() - start
+    else:
+        from tetris import Tetris  # The window needs pygame, headless playback doesn't
+        engine = Tetris(seed=replay.seed, weights=replay.weights, width=replay.width, height=replay.height)
+        seconds = engine.replay_loop(replay, speed=int(args.speed))
+
+    matches = replay.final is None or final_state(engine) == replay.final
+    print(f"{len(replay.actions)} actions in {seconds:.3f}s, score {engine.score}, lines {engine.total_lines_cleared}, "
+          f"{'matches the recording' if matches else 'DIFFERS from the recording'}", file=sys.stderr)
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import time
+from shape import TETROMINO_DATA
+from candidate import Candidate, best_candidate, best_candidates, by_weight
+from reachability import get_spawn_position, reachable_placements
+from stats import BoardStats
+
+# Value of a line of play that tops out
+LOSS = float('inf')
+
+
+class SearchCancelled(Exception):
+    # Raised out of a search when its should_stop callback asks it to give up
+    pass
+
+
+class LookaheadSearch:
+    # Looks past the current piece to the preview piece and the hold slot.
+    # A line of play is worth the sum of the Brain weights of its placements, so the landing height
+    # of every piece counts, not only the last one.
+    # depth is the number of placements searched: 1 is greedy, 2 also places the next piece,
+    # deeper plies average over every tetromino since those pieces are not known yet.
+    # beam_width keeps only that many of the best placements per ply for expansion (None = exhaustive).
+    # With an evaluator (the vectorized module) every ply's placements are scored as one NumPy batch.
+    def __init__(self, brain, depth=2, beam_width=None, use_hold=True, max_table_size=200000, evaluator=None):
+        self.brain = brain
+        self.evaluator = evaluator
+        self.depth = depth
+        self.beam_width = beam_width
+        self.use_hold = use_hold
+        self.max_table_size = max_table_size
+
+        # Board values already searched, keyed by the board's Zobrist hash and the pieces still to place
+        self.transpositions = {}
+
+        # Checked between nodes, the search raises SearchCancelled once it returns True
+        self.should_stop = None
+
+        self.searches = 0
+        self.nodes = 0
+        self.table_hits = 0
+        self.table_lookups = 0
+        self.last_search_ms = 0.0
+        self.total_search_ms = 0.0
+
+    def hit_rate(self):
+        return self.table_hits / self.table_lookups if self.table_lookups else 0.0
+
+    def get_stats(self):
+        return {
+            'searches': self.searches,
+            'nodes': self.nodes,
+            'table_hits': self.table_hits,
+            'table_lookups': self.table_lookups,
+            'hit_rate': self.hit_rate(),
+            'table_size': len(self.transpositions),
+            'last_search_ms': self.last_search_ms,
+            'average_search_ms': self.total_search_ms / self.searches if self.searches else 0.0,
+        }
+
+    def placements(self, board, stats, tetromino):
+        # A Candidate for every placement reachable from the spawn, streamed in the move generator's order
+        resting = reachable_placements(board, tetromino, get_spawn_position(board.width))
+        self.nodes += len(resting)
+        return self.score(board, stats, resting)
+
+    def expanded(self, candidates):
+        # The candidates a ply expands. With a beam only a heap of the best beam_width is kept, best first,
+        # equal weights in the move generator's order.
+        if self.beam_width is None:
+            return candidates
+        return best_candidates(candidates, self.beam_width)
+
+    def score(self, board, stats, resting):
+        # Candidates for (placement, col, row) placements, one at a time. Features come from the board's stats,
+        # so a candidate costs the same however big the board is, unless the evaluator batches the whole ply.
+        if self.evaluator is not None:
+            _, weights = self.evaluator.evaluate_placements(board, resting, self.brain)
+            return (Candidate(weight, placement, col, row) for (placement, col, row), weight in zip(resting, weights.tolist()))
+        compute_weight = self.brain.compute_weight
+        return (Candidate(compute_weight(*stats.preview(placement.cells, (col, row))), placement, col, row)
+                for placement, col, row in resting)
+
+    def options(self, pieces, hold, hold_available):
+        # (piece to place, pieces left afterwards, hold slot afterwards, hold used) for one ply
+        options = [(pieces[0], pieces[1:], hold, False)]
+        if self.use_hold and hold_available:
+            if hold is not None:
+                options.append((hold, pieces[1:], pieces[0], True))
+            elif len(pieces) > 1:
+                options.append((pieces[1], pieces[2:], pieces[0], True))
+        return options
+
+    def board_after(self, board, stats, candidate):
+        # The board with the candidate locked and its lines cleared, and its stats
+        position = (candidate.col, candidate.row)
+        child = board.copy(with_colors=False)
+        child.apply(candidate.cells, position)
+        child_stats = stats.copy(child)
+        child_stats.lock(candidate.cells, position)
+        child_stats.clear_rows(child.clear_full_rows([candidate.row + dy for dy, _ in candidate.placement.row_masks]))
+        return child, child_stats
+
+    def value(self, board, stats, pieces, hold, depth):
+        # Lowest total weight reachable by placing `depth` more pieces on the board
+        if not pieces:
+            # The piece isn't known yet: average over everything the bag could hold
+            values = [self.value(board, stats, (tetromino,), hold, depth) for tetromino in TETROMINO_DATA]
+            return sum(values) / len(values)
+
+        if self.should_stop is not None and self.should_stop():
+            raise SearchCancelled()
+
+        key = (board.zobrist, pieces[:depth], hold, depth)
+        self.table_lookups += 1
+        if key in self.transpositions:
+            self.table_hits += 1
+            return self.transpositions[key]
+
+        best = LOSS
+        for tetromino, rest, new_hold, _ in self.options(pieces, hold, True):
+            candidates = self.placements(board, stats, tetromino)
+            if depth == 1:
+                # A leaf only needs the lowest weight, so its candidates are never held in a list
+                leaf = best_candidate(candidates)
+                if leaf is not None and leaf.weight < best:
+                    best = leaf.weight
+                continue
+            for candidate in self.expanded(candidates):
+                weight = candidate.weight + self.value(*self.board_after(board, stats, candidate), rest, new_hold,
+                                                       depth - 1)
+                if weight < best:
+                    best = weight
+
+        if len(self.transpositions) >= self.max_table_size:
+            self.transpositions.clear()
+        self.transpositions[key] = best
+        return best
+
+    def search(self, board, current_tetromino, next_tetromino, hold_tetromino, hold_available):
+        # Best first placement for the current position.
+        # Returns (value, use_hold, tetromino, candidate), or None if nothing fits.
+        start = time.perf_counter()
+
+        best = None
+        stats = BoardStats(board)
+        pieces = (current_tetromino, next_tetromino)
+        for tetromino, rest, new_hold, use_hold in self.options(pieces, hold_tetromino, hold_available):
+            # Best weight first, so equal values go to the better first placement
+            for candidate in sorted(self.expanded(self.placements(board, stats, tetromino)), key=by_weight):
+                value = candidate.weight
+                if self.depth > 1:
+                    value += self.value(*self.board_after(board, stats, candidate), rest, new_hold, self.depth - 1)
+                if best is None or value < best[0]:
+                    best = (value, use_hold, tetromino, candidate)
+
+        self.last_search_ms = (time.perf_counter() - start) * 1000
+        self.total_search_ms += self.last_search_ms
+        self.searches += 1
+        return best
@@ -0,0 +1,156 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from brain import load_weights
+from dataset import DatasetWriter
+from engine import TetrisEngine, GRID_WIDTH, GRID_HEIGHT
+from instrumentation import Instrumentation, LEVELS, OFF, metrics_to_lines, write_metrics
+from replay import record, save_replay
+
+# Per-game fields summarized at the end of a run
+SUMMARY_FIELDS = ('pieces', 'lines', 'score', 'level', 'ms_per_piece')
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def play_game(seed, weights=None, max_pieces=None, vectorized=False, search_depth=1, beam_width=None,
+              log_level=OFF, metrics=False, replay_path=None, export_path=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+    # Play one complete game headlessly, letting the AI choose every move
+    instrumentation = Instrumentation(log_level=log_level, metrics=metrics)
+    start = time.perf_counter()
+    engine = TetrisEngine(seed=seed, weights=weights, vectorized=vectorized, search_depth=search_depth,
+                          beam_width=beam_width, instrumentation=instrumentation, width=width, height=height)
+    recorder = record(engine) if replay_path else None
+    writer = DatasetWriter(export_path, engine.board.width, engine.board.height) if export_path else None
+    pieces = 0
+
+    while not engine.game_over and (max_pieces is None or pieces < max_pieces):
+        if writer is not None:
+            writer.write_decision(engine, pieces)
+        engine.play_best_move()
+        pieces += 1
+
+    seconds = time.perf_counter() - start
+    if writer is not None:
+        writer.close()
+    if recorder is not None:
+        save_replay(recorder.finish(), replay_path)
+
+    result = {
+        'seed': seed,
+        'pieces': pieces,
+        'lines': engine.total_lines_cleared,
+        'score': engine.score,
+        'level': engine.level,
+        'game_over': engine.game_over,
+        'seconds': seconds,
+        'ms_per_piece': seconds * 1000 / pieces if pieces else 0.0,
+    }
+    if engine.search is not None:
+        result['search_hit_rate'] = engine.search.hit_rate()
+    if engine.move_cache is not None:
+        result['move_cache_hit_rate'] = engine.move_cache.hit_rate()
+    if metrics:
+        result['metrics'] = instrumentation.get_metrics()
+    return result
+
+
+def _play_game_job(job):
+    *arguments, export_dir, width, height = job
+    # Every worker process appends its games to its own training data file
+    export_path = os.path.join(export_dir, f'part-{os.getpid()}.tdata') if export_dir else None
+    return play_game(*arguments, export_path=export_path, width=width, height=height)
+
+
+def play_games(seeds, weights=None, max_pieces=None, workers=None, vectorized=False, search_depth=1, beam_width=None,
+               log_level=OFF, metrics=False, record_dir=None, export_dir=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+    # Play a batch of games across a process pool, yielding each result as soon as it finishes
+    jobs = [(seed, weights, max_pieces, vectorized, search_depth, beam_width, log_level, metrics,
+             os.path.join(record_dir, f'game-{seed}.json') if record_dir else None, export_dir, width, height)
+            for seed in seeds]
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(_play_game_job, jobs):
+            yield result
+
+
+def percentile(values, percent):
+    # Linear interpolation between the closest ranks
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(results):
+    summary = {'games': len(results)}
+    for field in SUMMARY_FIELDS:
+        values = [result[field] for result in results]
+        stats = {'mean': sum(values) / len(values) if values else 0.0}
+        for percent in SUMMARY_PERCENTILES:
+            stats[f'p{percent}'] = percentile(values, percent)
+        summary[field] = stats
+    return summary
+
+
+def print_summary(summary, file=sys.stderr):
+    print(f"Games: {summary['games']}", file=file)
+    header = ' '.join(f"{'p' + str(percent):>10}" for percent in SUMMARY_PERCENTILES)
+    print(f"{'':<14}{'mean':>10} {header}", file=file)
+    for field in SUMMARY_FIELDS:
+        stats = summary[field]
+        values = ' '.join(f"{stats['p' + str(percent)]:>10.1f}" for percent in SUMMARY_PERCENTILES)
+        print(f"{field:<14}{stats['mean']:>10.1f} {values}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play AI games in parallel and summarize the results.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game, the others count up from it')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--max-pieces', type=int, default=None, help='stop a game after this many pieces')
+    parser.add_argument('--weights', default=None, help='JSON weight set to play with (see tuner.py)')
+    parser.add_argument('--vectorized', action='store_true', help='score candidate moves in NumPy batches')
+    parser.add_argument('--depth', type=int, default=1, help='placements searched per move (2 looks at the next piece)')
+    parser.add_argument('--beam', type=int, default=None, help='expand only this many best placements per ply')
+    parser.add_argument('--output', default=None, help='write one JSON line per game here instead of stdout')
+    parser.add_argument('--log-level', choices=sorted(LEVELS), default='off', help='engine log messages written to stderr')
+    parser.add_argument('--metrics', default=None, help='append per-game counters and timings here as JSON lines')
+    parser.add_argument('--record-dir', default=None, help='save a replay of every game here (see replay.py)')
+    parser.add_argument('--export-dir', default=None, help='append every AI decision here as training data (see dataset.py)')
+    parser.add_argument('--width', type=int, default=GRID_WIDTH, help='board width in columns')
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT, help='board height in rows')
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.games)
+    for directory in (args.record_dir, args.export_dir):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    weights = load_weights(args.weights) if args.weights else None
+    results = []
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in play_games(seeds, weights=weights, max_pieces=args.max_pieces, workers=args.workers, vectorized=args.vectorized,
+                                 search_depth=args.depth, beam_width=args.beam, log_level=LEVELS[args.log_level],
+                                 metrics=args.metrics is not None, record_dir=args.record_dir, export_dir=args.export_dir,
+                                 width=args.width, height=args.height):
+            if args.metrics:
+                write_metrics(args.metrics, metrics_to_lines(result.pop('metrics'), seed=result['seed']))
+            results.append(result)
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+    summary = summarize(results)
+    print_summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+class BoardStats:
+    # Board statistics kept up to date across locks and line clears instead of rescanning the board.
+    # Every column is stored as a bitmask (bit y set = row y filled, row 0 at the top), so each
+    # per-column value is a handful of bit operations, and a lock only recomputes the columns it touched.
+    def __init__(self, board):
+        self.board = board
+        self.width = board.width
+        self.height = board.height
+        self.full_column = (1 << board.height) - 1
+        self.floor_bit = 1 << (board.height - 1)
+
+        self.full_rows = sum(1 for row in board.rows if row == board.full_row)
+        self.columns = [0] * self.width
+        for y, row in enumerate(board.rows):
+            for x in range(self.width):
+                if (row >> x) & 1:
+                    self.columns[x] |= 1 << y
+
+        self.heights = [0] * self.width
+        self.holes = [0] * self.width
+        self.blocks_above_holes = [0] * self.width
+        self.pillars = [0] * self.width
+        self.wells = [0] * self.width
+        self.totals = {}  # Board totals, summed on first use after the columns change
+        for x in range(self.width):
+            self.update_column(x)
+        for x in range(self.width):
+            self.update_neighbours(x)
+
+    # Per-column values, from the column bitmasks
+
+    def column_values(self, column):
+        # (height, holes, blocks above holes) of one column
+        if not column:
+            return 0, 0, 0
+        top = (column & -column).bit_length() - 1
+        height = self.height - top
+        blocks = column.bit_count()
+        top_run = ((column + 1) & ~column).bit_length() - 1  # Blocks stacked down from row 0 without a gap
+        return height, height - blocks, blocks - top_run
+
+    def column_pillars(self, left, column, right):
+        # Empty runs of 3+ cells flanked on both sides, ended by a block or the floor
+        flanked = ~column & left & right & self.full_column
+        deep = flanked & (flanked << 1) & (flanked << 2)
+        return (deep & ((column >> 1) | self.floor_bit)).bit_count()
+
+    def column_well(self, x, heights):
+        neighbours = []
+        if x > 0:
+            neighbours.append(heights[x - 1])
+        if x < self.width - 1:
+            neighbours.append(heights[x + 1])
+        return max(0, min(neighbours) - heights[x]) if neighbours else 0
+
+    def update_column(self, x):
+        self.heights[x], self.holes[x], self.blocks_above_holes[x] = self.column_values(self.columns[x])
+        self.totals.clear()
+
+    def update_neighbours(self, x):
+        # Pillars and wells depend on the columns either side
+        if 0 < x < self.width - 1:
+            self.pillars[x] = self.column_pillars(self.columns[x - 1], self.columns[x], self.columns[x + 1])
+        self.wells[x] = self.column_well(x, self.heights)
+        self.totals.clear()
+
+    def copy(self, board):
+        # The same statistics for `board`, a copy of this one's board, to be updated separately
+        stats = BoardStats.__new__(BoardStats)
+        stats.__dict__.update(self.__dict__)
+        stats.board = board
+        for name in ('columns', 'heights', 'holes', 'blocks_above_holes', 'pillars', 'wells'):
+            setattr(stats, name, list(getattr(self, name)))
+        stats.totals = dict(self.totals)
+        return stats
+
+    # Board totals
+
+    def total_holes(self):
+        if 'holes' not in self.totals:
+            self.totals['holes'] = sum(self.holes)
+        return self.totals['holes']
+
+    def total_blocks_above_holes(self):
+        if 'blocks_above_holes' not in self.totals:
+            self.totals['blocks_above_holes'] = sum(self.blocks_above_holes)
+        return self.totals['blocks_above_holes']
+
+    def total_pillars(self):
+        if 'pillars' not in self.totals:
+            self.totals['pillars'] = sum(self.pillars)
+        return self.totals['pillars']
+
+    def bumpiness(self):
+        if 'bumpiness' not in self.totals:
+            heights = self.heights
+            self.totals['bumpiness'] = sum(abs(heights[i] - heights[i + 1]) for i in range(self.width - 1))
+        return self.totals['bumpiness']
+
+    def blocks_in_rightmost_lane(self):
+        return self.columns[-1].bit_count()
+
+    # Updates
+
+    def touched_columns(self, tetromino, position):
+        masks = {}
+        for x, y in tetromino:
+            masks[x + position[0]] = masks.get(x + position[0], 0) | (1 << (y + position[1]))
+        return masks
+
+    def lock(self, tetromino, position):
+        # A piece was placed on the board: only its columns (and their neighbours) change
+        rows = self.board.rows
+        full_row = self.board.full_row
+        self.full_rows += sum(1 for y in {y + position[1] for _, y in tetromino} if rows[y] == full_row)
+
+        touched = self.touched_columns(tetromino, position)
+        for x, mask in touched.items():
+            self.columns[x] |= mask
+            self.update_column(x)
+        for x in range(max(0, min(touched) - 1), min(self.width, max(touched) + 2)):
+            self.update_neighbours(x)
+
+    def clear_rows(self, cleared_rows):
+        # Full rows were removed: drop their bit from every column and shift the rows above them down
+        if not cleared_rows:
+            return
+        self.full_rows -= len(cleared_rows)
+        for x in range(self.width):
+            column = self.columns[x]
+            for y in sorted(cleared_rows):
+                above = column & ((1 << y) - 1)
+                below = column & ~((1 << (y + 1)) - 1)
+                column = (above << 1) | below
+            self.columns[x] = column
+            self.update_column(x)
+        for x in range(self.width):
+            self.update_neighbours(x)
+
+    def preview(self, tetromino, position):
+        # The feature vector (see features.FEATURE_NAMES) the board would have with the piece placed,
+        # computed from the touched columns only, without changing anything, so its cost doesn't grow with the width
+        touched = self.touched_columns(tetromino, position)
+        columns = self.columns
+        heights = self.heights
+        new_heights = {}
+
+        holes = self.total_holes()
+        blocks_above_holes = self.total_blocks_above_holes()
+        new_columns = {}
+        for x, mask in touched.items():
+            column = columns[x] | mask
+            new_columns[x] = column
+            height, column_holes, column_blocks_above_holes = self.column_values(column)
+            new_heights[x] = height
+            holes += column_holes - self.holes[x]
+            blocks_above_holes += column_blocks_above_holes - self.blocks_above_holes[x]
+
+        pillars = self.total_pillars()
+        for x in range(max(1, min(touched) - 1), min(self.width - 1, max(touched) + 2)):
+            left = new_columns.get(x - 1, columns[x - 1])
+            right = new_columns.get(x + 1, columns[x + 1])
+            pillars += self.column_pillars(left, new_columns.get(x, columns[x]), right) - self.pillars[x]
+
+        # Bumpiness only changes next to the touched columns
+        bumpiness = self.bumpiness()
+        for i in range(max(0, min(touched) - 1), min(self.width - 1, max(touched) + 1)):
+            left = new_heights.get(i, heights[i])
+            right = new_heights.get(i + 1, heights[i + 1])
+            bumpiness += abs(left - right) - abs(heights[i] - heights[i + 1])
+
+        rightmost = self.width - 1
+        blocks_in_rightmost_lane = new_columns.get(rightmost, columns[rightmost]).bit_count()
+
+        # Rows the piece completes
+        rows = self.board.rows
+        full_row = self.board.full_row
+        row_masks = {}
+        for x, y in tetromino:
+            grid_y = y + position[1]
+            row_masks[grid_y] = row_masks.get(grid_y, 0) | (1 << (x + position[0]))
+        lines_cleared = self.full_rows + sum(1 for y, mask in row_masks.items() if rows[y] | mask == full_row)
+
+        max_y = max(0, max(y + position[1] for _, y in tetromino))
+        max_height = self.height - max_y
+
+        return (holes, blocks_above_holes, pillars, max_height, bumpiness, blocks_in_rightmost_lane, lines_cleared)
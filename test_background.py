@@ -0,0 +1,34 @@
+import time
+from background import BackgroundAI
+from engine import TetrisEngine
+from instrumentation import Instrumentation
+
+
+def wait_for_move(background_ai):
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        best_move = background_ai.poll()
+        if best_move is not False:
+            return best_move
+        time.sleep(0.001)
+    raise AssertionError("The background AI never chose a move")
+
+
+def test_worker_metrics_are_merged_into_the_game():
+    instrumentation = Instrumentation(metrics=True)
+    engine = TetrisEngine(seed=2, instrumentation=instrumentation)
+    expected = engine.best_move
+    instrumentation.reset()
+
+    background_ai = BackgroundAI(engine)
+    try:
+        assert background_ai.worker.instrumentation is not instrumentation
+        for _ in range(3):
+            background_ai.submit(engine)
+            assert wait_for_move(background_ai) == expected
+    finally:
+        background_ai.close()
+    # Every search the worker ran is counted in the game's instrumentation, none of them twice
+    assert instrumentation.timings['move_generation'].count == 3
+    assert instrumentation.counters['candidates_evaluated'] > 0
+    assert not background_ai.finished
@@ -0,0 +1,54 @@
+import pytest
+import dataset
+from dataset import (DATASET_VERSION, HEADER_ALIGNMENT, NO_CHOICE, PIECES, DatasetWriter, load_dataset, max_candidates,
+                     read_header, record_dtype)
+from engine import TetrisEngine
+from features import FEATURE_NAMES
+from selfplay import play_game
+
+pytestmark = pytest.mark.skipif(not dataset.is_available(), reason="needs NumPy")
+
+
+def test_selfplay_export_round_trip(tmp_path):
+    path = tmp_path / 'games.tdata'
+    play_game(6, max_pieces=40, export_path=str(path), width=8, height=16)
+    play_game(7, max_pieces=25, export_path=str(path), width=8, height=16)  # Appended after the first game
+
+    with open(path, 'rb') as dataset_file:
+        header, offset = read_header(dataset_file)
+    assert header == {'version': DATASET_VERSION, 'width': 8, 'height': 16, 'max_candidates': max_candidates(8),
+                      'pieces': list(PIECES), 'features': list(FEATURE_NAMES)}
+    assert offset % HEADER_ALIGNMENT == 0
+
+    records = load_dataset(str(path))
+    assert records.dtype == record_dtype(8, 16)
+    assert len(records) == 65
+    assert list(records['seed'][[0, 39, 40]]) == [6, 6, 7]
+    assert list(records['piece_index'][38:42]) == [38, 39, 0, 1]
+    for record in records:
+        count = record['candidate_count']
+        assert 0 < count <= max_candidates(8)
+        assert record['chosen'] < count
+        assert not record['candidate_weight'][count:].any()  # Unused slots stay zeroed
+
+
+def test_truncation_keeps_the_chosen_candidate(tmp_path):
+    # The lookahead search sometimes chooses a placement whose own weight isn't among the lowest two
+    path = tmp_path / 'search.tdata'
+    engine = TetrisEngine(seed=3, search_depth=2, beam_width=4, move_cache=False)
+    with DatasetWriter(str(path)) as writer:
+        writer.candidates = 2
+        chosen = []
+        for piece_index in range(30):
+            writer.write_decision(engine, piece_index)
+            chosen.append((engine.best_move['rotation'], *engine.best_move['position']))
+            engine.play_best_move()
+    assert writer.truncated == 30
+
+    records = load_dataset(str(path))
+    for record, (rotation, x, y) in zip(records, chosen):
+        assert record['candidate_count'] == 2
+        index = record['chosen']
+        assert index != NO_CHOICE
+        assert (record['candidate_rotation'][index], record['candidate_x'][index],
+                record['candidate_y'][index]) == (rotation, x, y)
@@ -0,0 +1,42 @@
+import pytest
+from engine import MIN_GRID_SIZE, TetrisEngine
+from placement import PLACEMENTS
+from selfplay import play_game
+
+
+@pytest.mark.parametrize('width', range(MIN_GRID_SIZE, 11))
+def test_every_tetromino_spawns_on_the_board(width):
+    engine = TetrisEngine(seed=1, ai=False, width=width)
+    for placements in PLACEMENTS.values():
+        assert not placements[0].collides(engine.board, *engine.spawn_position)
+
+
+def test_minimum_width_game():
+    engine = TetrisEngine(seed=14, width=MIN_GRID_SIZE)
+    assert engine.step('Instant Drop')  # The first piece is an I, as wide as the board
+    assert play_game(14, width=MIN_GRID_SIZE, max_pieces=200)['pieces'] > 10
+
+
+def test_instant_drop_off_the_board_stays_put():
+    engine = TetrisEngine(seed=1, ai=False, width=MIN_GRID_SIZE)
+    cells = PLACEMENTS['I'][0].cells
+    for position in ([-1, 0], [1, 0], [MIN_GRID_SIZE, 3]):
+        assert engine.simulate_instant_drop(cells, list(position)) == position
+
+
+def test_too_small_board_is_rejected():
+    with pytest.raises(ValueError):
+        TetrisEngine(width=MIN_GRID_SIZE - 1)
+    with pytest.raises(ValueError):
+        TetrisEngine(height=MIN_GRID_SIZE - 1)
+
+
+def test_play_best_move_places_one_piece_until_game_over():
+    engine = TetrisEngine(seed=9, width=6, height=10)
+    pieces = 0
+    while engine.play_best_move():
+        pieces += 1
+        assert engine.pieces_placed == pieces
+    assert engine.game_over
+    assert engine.pieces_placed > 5
+    assert not engine.play_best_move()
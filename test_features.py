@@ -0,0 +1,62 @@
+import random
+import pytest
+import vectorized
+from brain import Brain
+from engine import BlockMatrix, DEFAULT_WEIGHTS
+from reachability import get_spawn_position, reachable_placements
+from shape import TETROMINO_DATA
+from stats import BoardStats
+from testing import extract_features, random_board
+
+BOARDS = 60
+
+
+def random_boards():
+    rng = random.Random(2)
+    return [random_board(rng, width=rng.choice((4, 7, 10, 16)), full_rows=0.15) for _ in range(BOARDS)]
+
+
+def block_matrix_features(board, tetromino, position):
+    # The feature vector from the original one-statistic-per-method BlockMatrix
+    block_matrix = BlockMatrix(board)
+    return (block_matrix.count_holes(), block_matrix.count_blocks_above_holes(), block_matrix.count_pillars(),
+            block_matrix.calculate_maximum_line_height(tetromino, position), block_matrix.calculate_bumpiness(),
+            block_matrix.count_number_of_blocks_in_rightmost_lane(), block_matrix.calculate_lines_cleared(board))
+
+
+def test_extract_features_matches_block_matrix():
+    for board in random_boards():
+        for tetromino in TETROMINO_DATA:
+            for placement, col, row in reachable_placements(board, tetromino, get_spawn_position(board.width)):
+                placed = board.apply(placement.cells, (col, row))
+                features, heights = extract_features(board, placement.cells, (col, row))
+                assert features == block_matrix_features(board, placement.cells, (col, row))
+                assert heights == BlockMatrix(board).calculate_column_heights()
+                assert heights == [BlockMatrix(board).calculate_column_height(x) for x in range(board.width)]
+                board.undo(placed)
+
+
+def test_preview_matches_extract_features():
+    for board in random_boards():
+        stats = BoardStats(board)
+        for tetromino in TETROMINO_DATA:
+            for placement, col, row in reachable_placements(board, tetromino, get_spawn_position(board.width)):
+                placed = board.apply(placement.cells, (col, row))
+                features, _ = extract_features(board, placement.cells, (col, row))
+                board.undo(placed)
+                assert stats.preview(placement.cells, (col, row)) == features
+
+
+@pytest.mark.skipif(not vectorized.is_available(), reason="needs NumPy")
+def test_vectorized_features_match_extract_features():
+    brain = Brain(**DEFAULT_WEIGHTS)
+    for board in random_boards():
+        for tetromino in TETROMINO_DATA:
+            placements = reachable_placements(board, tetromino, get_spawn_position(board.width))
+            batch, weights = vectorized.evaluate_placements(board, placements, brain)
+            for (placement, col, row), features, weight in zip(placements, batch.tolist(), weights.tolist()):
+                placed = board.apply(placement.cells, (col, row))
+                expected, _ = extract_features(board, placement.cells, (col, row))
+                board.undo(placed)
+                assert tuple(features) == expected
+                assert weight == brain.compute_weight(*expected)
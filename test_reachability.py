@@ -0,0 +1,85 @@
+import collections
+import random
+from engine import TetrisEngine
+from placement import PLACEMENTS
+from reachability import Reachability, get_kicks, get_spawn_position
+from shape import TETROMINO_DATA
+from stats import BoardStats
+from testing import random_board
+
+BOARDS = 25
+
+
+def brute_force(board, tetromino, start):
+    # Shortest number of inputs to lock the tetromino in each resting state, found by trying every input
+    # from every state one at a time with the engine's rules
+    rotations = TETROMINO_DATA[tetromino]['rotations']
+
+    def fits(rotation, x, y):
+        return y >= 0 and not board.collides(rotations[rotation], (x, y))
+
+    def neighbours(rotation, x, y):
+        for dx, dy in ((-1, 0), (1, 0), (0, 1)):
+            if fits(rotation, x + dx, y + dy):
+                yield rotation, x + dx, y + dy
+        if len(rotations) > 1:
+            for target in ((rotation + 1) % len(rotations), (rotation - 1) % len(rotations)):
+                for dx, dy in get_kicks(tetromino):
+                    if fits(target, x + dx, y + dy):
+                        yield target, x + dx, y + dy
+                        break
+
+    if not fits(*start):
+        return {}
+    distances = {start: 0}
+    queue = collections.deque([start])
+    while queue:
+        state = queue.popleft()
+        for neighbour in neighbours(*state):
+            if neighbour not in distances:
+                distances[neighbour] = distances[state] + 1
+                queue.append(neighbour)
+
+    # Every state ends with an Instant Drop to wherever it lands
+    resting = {}
+    for (rotation, x, y), distance in distances.items():
+        while fits(rotation, x, y + 1):
+            y += 1
+        resting[(rotation, x, y)] = min(resting.get((rotation, x, y), distance + 1), distance + 1)
+    return resting
+
+
+def play_path(engine, board, tetromino, path):
+    # Put the tetromino at the spawn on a copy of the board, then apply the path's inputs
+    engine.board = board.copy()
+    engine.stats = BoardStats(engine.board)
+    engine.current_tetromino = tetromino
+    engine.rotation = 0
+    engine.tetromino_shape = TETROMINO_DATA[tetromino]['rotations'][0]
+    engine.tetromino_color = TETROMINO_DATA[tetromino]['color']
+    engine.tetromino_position = list(engine.spawn_position)
+    for step in path:
+        engine.step(step)
+
+
+def test_reachable_placements_and_paths():
+    rng = random.Random(3)
+    engine = TetrisEngine(seed=1, ai=False, move_cache=False)
+    start = (0, *get_spawn_position(10))
+    for _ in range(BOARDS):
+        board = random_board(rng)
+        for tetromino in TETROMINO_DATA:
+            expected = brute_force(board, tetromino, start)
+            reachability = Reachability(board, tetromino, start[1:])
+            assert {(placement.rotation, x, y) for placement, x, y in reachability.resting_placements()} == set(expected)
+
+            for (rotation, x, y), distance in expected.items():
+                path = reachability.path(rotation, x, y)
+                assert len(path) == distance  # Shortest
+
+                # Played through the engine, the path locks the piece exactly there
+                play_path(engine, board, tetromino, path)
+                landed = board.copy()
+                landed.place(PLACEMENTS[tetromino][rotation].cells, (x, y), TETROMINO_DATA[tetromino]['color'])
+                landed.clear_full_rows()
+                assert engine.board.rows == landed.rows
@@ -0,0 +1,36 @@
+from engine import TetrisEngine
+from replay import Replay, load_replay, play_replay, record, save_replay, verify_replay
+
+
+def recorded_game(pieces=60, **engine_options):
+    engine = TetrisEngine(seed=11, **engine_options)
+    recorder = record(engine)
+    for _ in range(pieces):
+        # A soft drop and now and then a hold before the AI's steps, so every kind of action ends up in the replay
+        engine.step('Hold' if engine.pieces_placed % 7 == 3 else 'Soft Drop')
+        if not engine.play_best_move():
+            break
+    return engine, recorder.finish()
+
+
+def test_replay_reproduces_the_game():
+    engine, replay = recorded_game()
+    assert replay.final['score'] == engine.score > 0
+    assert verify_replay(replay)
+    assert play_replay(replay).board.rows == engine.board.rows
+
+
+def test_replay_survives_a_save(tmp_path):
+    _, replay = recorded_game(pieces=20, width=12, height=18)
+    path = tmp_path / 'game.json'
+    save_replay(replay, str(path))
+    loaded = load_replay(str(path))
+    assert (loaded.width, loaded.height) == (12, 18)
+    assert loaded.actions == replay.actions
+    assert verify_replay(loaded)
+
+
+def test_tampered_replay_fails_verification():
+    _, replay = recorded_game(pieces=20)
+    tampered = Replay(replay.seed, replay.weights, replay.actions[:-1], replay.final, replay.width, replay.height)
+    assert not verify_replay(tampered)
@@ -0,0 +1,45 @@
+import random
+from engine import TetrisEngine
+from search import LookaheadSearch
+from stats import BoardStats
+
+STAT_NAMES = ('columns', 'heights', 'holes', 'blocks_above_holes', 'pillars', 'wells', 'full_rows')
+
+
+def assert_matches_recompute(stats, board):
+    fresh = BoardStats(board)
+    for name in STAT_NAMES:
+        assert getattr(stats, name) == getattr(fresh, name), name
+    assert stats.total_holes() == fresh.total_holes()
+    assert stats.total_blocks_above_holes() == fresh.total_blocks_above_holes()
+    assert stats.total_pillars() == fresh.total_pillars()
+    assert stats.bumpiness() == fresh.bumpiness()
+
+
+def test_engine_stats_match_recompute():
+    # The engine's stats are updated by every lock and line clear, never rebuilt.
+    # A few random inputs before each move, holds among them, take the games off the AI's usual path.
+    rng = random.Random(4)
+    for seed in range(4):
+        engine = TetrisEngine(seed=seed, move_cache=False, width=rng.choice((6, 10, 13)))
+        for _ in range(150):
+            for _ in range(rng.randint(0, 2)):
+                engine.step(rng.choice(('Move Left', 'Move Right', 'Rotate Clockwise', 'Hold')))
+            engine.play_best_move()
+            assert_matches_recompute(engine.stats, engine.board)
+            if engine.game_over:
+                break
+
+
+def test_search_child_stats_match_recompute():
+    # The lookahead search carries a copy of its parent's stats into every child board
+    engine = TetrisEngine(seed=3, move_cache=False)
+    search = LookaheadSearch(engine.brain)
+    for _ in range(60):
+        stats = BoardStats(engine.board)
+        for tetromino in 'IOTSZJL':
+            for candidate in search.placements(engine.board, stats, tetromino):
+                child, child_stats = search.board_after(engine.board, stats, candidate)
+                assert_matches_recompute(child_stats, child)
+        assert_matches_recompute(stats, engine.board)  # The parent's stats are left alone
+        engine.play_best_move()
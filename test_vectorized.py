@@ -0,0 +1,38 @@
+import pytest
+import vectorized
+from engine import TetrisEngine
+from placement import PLACEMENTS
+
+pytestmark = pytest.mark.skipif(not vectorized.is_available(), reason="needs NumPy")
+
+
+def candidate_values(candidates):
+    return [(candidate.rotation, candidate.col, candidate.row, candidate.weight) for candidate in candidates]
+
+
+def test_vectorized_candidates_match_scalar():
+    scalar = TetrisEngine(seed=5, move_cache=False)
+    batched = TetrisEngine(seed=5, move_cache=False, vectorized=True)
+    assert batched.vectorized
+    for _ in range(120):
+        for tetromino in PLACEMENTS:
+            assert (candidate_values(batched.generate_possible_moves(tetromino, batched.spawn_position)) ==
+                    candidate_values(scalar.generate_possible_moves(tetromino, scalar.spawn_position)))
+        assert batched.best_move == scalar.best_move
+        scalar.play_best_move()
+        batched.play_best_move()
+        assert batched.board.rows == scalar.board.rows
+        if scalar.game_over:
+            break
+
+
+def test_vectorized_lookahead_matches_scalar():
+    scalar = TetrisEngine(seed=8, move_cache=False, search_depth=2, beam_width=6)
+    batched = TetrisEngine(seed=8, move_cache=False, search_depth=2, beam_width=6, vectorized=True)
+    for _ in range(30):
+        assert batched.best_move == scalar.best_move
+        scalar.play_best_move()
+        batched.play_best_move()
+        if scalar.game_over:
+            break
+    assert batched.score == scalar.score
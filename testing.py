@@ -0,0 +1,82 @@
+from board import Board
+
+# Helpers shared by the tests
+
+
+def random_board(rng, width=10, height=20, full_rows=0.0):
+    # A random stack with its top rows thinned out, so there are holes to count and overhangs to slide and
+    # spin under. Every row of the stack has a gap, except the share of full_rows filled in completely.
+    board = Board(width, height)
+    stack = rng.randint(3, height - 6)
+    for y in range(height - stack, height):
+        if rng.random() < full_rows:
+            board.rows[y] = board.full_row
+        else:
+            board.rows[y] = rng.getrandbits(width) & ~(1 << rng.randrange(width))
+    for y in range(height - stack, height - stack + 2):
+        board.rows[y] &= rng.getrandbits(width)
+    board.zobrist = board.compute_zobrist()
+    return board
+
+
+def extract_features(board, tetromino, position):
+    # The reference feature vector: every BlockMatrix statistic recomputed from scratch in a single sweep
+    # over the row bitmasks, to check the incremental and batched versions against.
+    # Returns the feature vector (see features.FEATURE_NAMES) and the column heights.
+    width = board.width
+    height = board.height
+    full_row = board.full_row
+    inner_columns = full_row & ~1 & ~(1 << (width - 1))
+    rightmost_col = width - 1
+
+    holes = 0
+    blocks_above_holes = 0
+    pillars = 0
+    blocks_in_rightmost_lane = 0
+    lines_cleared = 0
+    heights = [0] * width
+
+    blocks_seen = 0  # Columns where a block has been found so far
+    holes_seen = 0  # Columns where an empty cell has been found so far
+    depth_1 = depth_2 = depth_3 = 0  # Columns inside a pillar hole of depth >= 1, >= 2 and >= 3
+
+    for row_index, row in enumerate(board.rows):
+        empty = ~row & full_row
+
+        holes += (blocks_seen & empty).bit_count()
+        blocks_above_holes += (row & holes_seen).bit_count()
+        blocks_in_rightmost_lane += (row >> rightmost_col) & 1
+        if row == full_row:
+            lines_cleared += 1
+
+        # Columns whose top block is in this row
+        new_columns = row & ~blocks_seen
+        while new_columns:
+            lowest_bit = new_columns & -new_columns
+            heights[lowest_bit.bit_length() - 1] = height - row_index
+            new_columns ^= lowest_bit
+
+        # Pillar holes: empty cells flanked on both sides, 3 or more deep, ended by a block or the floor
+        flanked = empty & (row << 1) & (row >> 1) & inner_columns
+        pillars += (depth_3 & row).bit_count()
+        depth_3 = depth_2 & flanked
+        depth_2 = depth_1 & flanked
+        depth_1 = flanked
+
+        blocks_seen |= row
+        holes_seen |= empty
+
+    pillars += depth_3.bit_count()
+
+    bumpiness = 0
+    for i in range(width - 1):
+        bumpiness += abs(heights[i] - heights[i + 1])
+
+    max_y = 0
+    for x, y in tetromino:
+        if y + position[1] > max_y:
+            max_y = y + position[1]
+    max_height = height - max_y
+
+    features = (holes, blocks_above_holes, pillars, max_height, bumpiness, blocks_in_rightmost_lane, lines_cleared)
+    return features, heights
@@ -0,0 +1,214 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+from brain import WEIGHT_NAMES, save_weights
+from engine import DEFAULT_WEIGHTS
+from selfplay import play_game
+
+
+class WeightTuner:
+    # Separable CMA-ES over the Brain weights: a mean, a global step size and one variance per weight.
+    # Every candidate plays the same seeded games in a generation, so they are compared on equal terms.
+    # Generations play different seeds, so the weight set kept as the best is judged on a separate set of
+    # validation seeds that never changes.
+    def __init__(self, initial_weights=None, population=12, sigma=1.0, seed=0):
+        if initial_weights is None:
+            initial_weights = DEFAULT_WEIGHTS
+        dimensions = len(WEIGHT_NAMES)
+
+        self.seed = seed
+        self.population = population
+        self.parents = population // 2
+        self.generation = 0
+
+        self.mean = [float(initial_weights[name]) for name in WEIGHT_NAMES]
+        self.initial_sigma = sigma
+        self.sigma = sigma
+        self.variances = [1.0] * dimensions
+        self.sigma_path = [0.0] * dimensions
+
+        self.best_weights = dict(initial_weights)
+        self.best_fitness = None
+        self.history = []
+
+        # Recombination weights and the standard CMA-ES learning rates for this population size
+        raw = [math.log(self.parents + 0.5) - math.log(rank + 1) for rank in range(self.parents)]
+        self.recombination = [weight / sum(raw) for weight in raw]
+        self.mu_eff = 1 / sum(weight ** 2 for weight in self.recombination)
+        self.c_sigma = (self.mu_eff + 2) / (dimensions + self.mu_eff + 5)
+        self.d_sigma = 1 + 2 * max(0.0, math.sqrt((self.mu_eff - 1) / (dimensions + 1)) - 1) + self.c_sigma
+        self.c_mu = min(1.0, self.mu_eff / (dimensions + 2) ** 2) * (dimensions + 2) / 3
+        self.expected_norm = math.sqrt(dimensions) * (1 - 1 / (4 * dimensions) + 1 / (21 * dimensions ** 2))
+
+    def ask(self):
+        # Sample this generation's candidates, returns (standard normal samples, weight sets)
+        rng = random.Random(f"{self.seed}:{self.generation}")
+        samples = []
+        candidates = []
+        for _ in range(self.population):
+            z = [rng.gauss(0.0, 1.0) for _ in WEIGHT_NAMES]
+            values = [m + self.sigma * math.sqrt(v) * zi for m, v, zi in zip(self.mean, self.variances, z)]
+            samples.append(z)
+            candidates.append(dict(zip(WEIGHT_NAMES, values)))
+        return samples, candidates
+
+    def game_seeds(self, games):
+        rng = random.Random(f"{self.seed}:{self.generation}:games")
+        return [rng.randrange(2 ** 31) for _ in range(games)]
+
+    def validation_seeds(self, games):
+        # The same every generation, unlike game_seeds
+        rng = random.Random(f"{self.seed}:validation")
+        return [rng.randrange(2 ** 31) for _ in range(games)]
+
+    def mean_weights(self):
+        # The distribution mean as a weight set, the tuner's current estimate of the best weights
+        return dict(zip(WEIGHT_NAMES, self.mean))
+
+    def consider(self, weights, fitness):
+        # Keep the weight set if its fitness on the validation seeds is the best so far
+        if self.best_fitness is None or fitness > self.best_fitness:
+            self.best_fitness = fitness
+            self.best_weights = dict(weights)
+
+    def tell(self, samples, candidates, fitnesses):
+        # Move the distribution towards the best half of the candidates (higher fitness is better)
+        ranked = sorted(range(len(candidates)), key=lambda index: fitnesses[index], reverse=True)
+        selected = ranked[:self.parents]
+
+        old_mean = self.mean
+        steps = [[(candidates[index][name] - m) / self.sigma for name, m in zip(WEIGHT_NAMES, old_mean)]
+                 for index in selected]
+        self.mean = [m + self.sigma * sum(w * step[d] for w, step in zip(self.recombination, steps))
+                     for d, m in enumerate(old_mean)]
+
+        # Step size control from the evolution path of the (isotropic) samples
+        z_mean = [sum(w * samples[index][d] for w, index in zip(self.recombination, selected))
+                  for d in range(len(WEIGHT_NAMES))]
+        scale = math.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff)
+        self.sigma_path = [(1 - self.c_sigma) * p + scale * z for p, z in zip(self.sigma_path, z_mean)]
+        path_norm = math.sqrt(sum(p ** 2 for p in self.sigma_path))
+        self.sigma *= math.exp(self.c_sigma / self.d_sigma * (path_norm / self.expected_norm - 1))
+
+        # Rank-mu update of the per-weight variances
+        self.variances = [(1 - self.c_mu) * v + self.c_mu * sum(w * step[d] ** 2 for w, step in zip(self.recombination, steps))
+                          for d, v in enumerate(self.variances)]
+
+        self.history.append({
+            'generation': self.generation,
+            'best_fitness': fitnesses[ranked[0]],
+            'mean_fitness': sum(fitnesses) / len(fitnesses),
+            'sigma': self.sigma,
+        })
+        self.generation += 1
+
+    def to_checkpoint(self):
+        return {
+            'seed': self.seed,
+            'population': self.population,
+            'initial_sigma': self.initial_sigma,
+            'generation': self.generation,
+            'mean': self.mean,
+            'sigma': self.sigma,
+            'variances': self.variances,
+            'sigma_path': self.sigma_path,
+            'best_weights': self.best_weights,
+            'best_fitness': self.best_fitness,
+            'history': self.history,
+        }
+
+    @classmethod
+    def from_checkpoint(cls, data):
+        tuner = cls(population=data['population'], sigma=data.get('initial_sigma', data['sigma']), seed=data['seed'])
+        for key in ('generation', 'mean', 'sigma', 'variances', 'sigma_path', 'best_weights', 'best_fitness', 'history'):
+            setattr(tuner, key, data[key])
+        return tuner
+
+
+def save_checkpoint(tuner, path):
+    # Write to a temporary file first so an interrupted run never leaves a truncated checkpoint
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as checkpoint_file:
+        json.dump(tuner.to_checkpoint(), checkpoint_file, indent=2)
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path):
+    with open(path) as checkpoint_file:
+        return WeightTuner.from_checkpoint(json.load(checkpoint_file))
+
+
+def _play_candidate_game(job):
+    index, seed, weights, max_pieces = job
+    return index, play_game(seed, weights=weights, max_pieces=max_pieces)
+
+
+def evaluate_candidates(pool, candidates, seeds, max_pieces):
+    # Fitness of each candidate: mean lines cleared over the same seeded games
+    jobs = [(index, seed, weights, max_pieces) for index, weights in enumerate(candidates) for seed in seeds]
+    lines = [0] * len(candidates)
+    for index, result in pool.imap_unordered(_play_candidate_game, jobs):
+        lines[index] += result['lines']
+    return [total / len(seeds) for total in lines]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tune the Brain weights with a CMA-ES style search over headless games.')
+    parser.add_argument('--generations', type=int, default=50, help='generations to run (in total, including resumed ones)')
+    parser.add_argument('--population', type=int, default=12, help='candidate weight sets per generation')
+    parser.add_argument('--games', type=int, default=8, help='seeded games played by every candidate')
+    parser.add_argument('--max-pieces', type=int, default=500, help='stop each game after this many pieces')
+    parser.add_argument('--sigma', type=float, default=1.0, help='initial step size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--checkpoint', default='tuner_checkpoint.json', help='resumed from if it exists')
+    parser.add_argument('--output', default='weights.json', help='where the best weight set is saved')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.checkpoint):
+        tuner = load_checkpoint(args.checkpoint)
+        print(f"Resuming from {args.checkpoint} at generation {tuner.generation}", file=sys.stderr)
+        # A resumed run carries on with the checkpoint's settings
+        for option, requested, resumed in (('--population', args.population, tuner.population),
+                                           ('--sigma', args.sigma, tuner.initial_sigma),
+                                           ('--seed', args.seed, tuner.seed)):
+            if requested != resumed:
+                print(f"Warning: {option} {requested} ignored, the checkpoint uses {resumed}", file=sys.stderr)
+    else:
+        tuner = WeightTuner(population=args.population, sigma=args.sigma, seed=args.seed)
+
+    validation_seeds = tuner.validation_seeds(args.games)
+    with multiprocessing.Pool(args.workers) as pool:
+        if tuner.best_fitness is None:
+            # The starting weights are the set to beat
+            tuner.consider(tuner.best_weights, evaluate_candidates(pool, [tuner.best_weights], validation_seeds,
+                                                                   args.max_pieces)[0])
+
+        while tuner.generation < args.generations:
+            samples, candidates = tuner.ask()
+            fitnesses = evaluate_candidates(pool, candidates, tuner.game_seeds(args.games), args.max_pieces)
+            tuner.tell(samples, candidates, fitnesses)
+
+            # The best sample of a generation is mostly luck with its seeds, the mean is what gets validated
+            mean_weights = tuner.mean_weights()
+            validation = evaluate_candidates(pool, [mean_weights], validation_seeds, args.max_pieces)[0]
+            tuner.history[-1]['validation_fitness'] = validation
+            tuner.consider(mean_weights, validation)
+
+            save_checkpoint(tuner, args.checkpoint)
+            save_weights(tuner.best_weights, args.output, fitness=tuner.best_fitness, generation=tuner.generation)
+
+            last = tuner.history[-1]
+            print(f"Generation {last['generation']}: best {last['best_fitness']:.1f} lines, "
+                  f"mean {last['mean_fitness']:.1f}, validated mean weights {validation:.1f}, "
+                  f"sigma {last['sigma']:.3f}", file=sys.stderr)
+
+    return tuner.best_weights
+
+
+if __name__ == "__main__":
+    main()
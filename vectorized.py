@@ -0,0 +1,101 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the engine falls back to the scalar path without it
+    np = None
+
+
+
+def is_available():
+    return np is not None
+
+
+def board_to_array(board):
+    # (height, width) bool array of the occupied cells. The rows are unpacked from their little-endian bytes,
+    # so boards wider than an int64 work too.
+    row_bytes = (board.width + 7) // 8
+    packed = np.frombuffer(b''.join(row.to_bytes(row_bytes, 'little') for row in board.rows), dtype=np.uint8)
+    bits = np.unpackbits(packed.reshape(board.height, row_bytes), axis=1, bitorder='little')
+    return bits[:, :board.width].astype(bool)
+
+
+def stack_placements(board, placements, base=None):
+    # One result board per placement, stacked into a (count, height, width) bool array,
+    # along with the max_height feature of each placement
+    if base is None:
+        base = board_to_array(board)
+    boards = np.repeat(base[None, :, :], len(placements), axis=0)
+
+    board_index = []
+    cell_y = []
+    cell_x = []
+    max_heights = []
+    for index, (placement, col, row) in enumerate(placements):
+        for x, y in placement.cells:
+            board_index.append(index)
+            cell_y.append(y + row)
+            cell_x.append(x + col)
+        max_heights.append(board.height - max(0, placement.max_y + row))
+    boards[board_index, cell_y, cell_x] = True
+
+    return boards, np.array(max_heights, dtype=np.int64)
+
+
+def compute_features(boards, max_heights):
+    # The feature vector (see features.FEATURE_NAMES) for every board at once, as a (count, 7) int array
+    count, height, width = boards.shape
+    empty = ~boards
+
+    # Holes: empty cells with a block somewhere above them in the same column
+    blocks_seen = np.logical_or.accumulate(boards, axis=1)
+    holes = (empty[:, 1:, :] & blocks_seen[:, :-1, :]).sum(axis=(1, 2))
+
+    # Blocks with an empty cell somewhere above them in the same column
+    holes_seen = np.logical_or.accumulate(empty, axis=1)
+    blocks_above_holes = (boards[:, 1:, :] & holes_seen[:, :-1, :]).sum(axis=(1, 2))
+
+    # Pillars: runs of 3+ empty cells flanked on both sides, ended by a block or the floor
+    flanked = np.zeros_like(boards)
+    flanked[:, :, 1:-1] = empty[:, :, 1:-1] & boards[:, :, :-2] & boards[:, :, 2:]
+    deep = flanked[:, 2:, :] & flanked[:, 1:-1, :] & flanked[:, :-2, :]
+    pillars = (deep[:, :-1, :] & boards[:, 3:, :]).sum(axis=(1, 2)) + deep[:, -1, :].sum(axis=1)
+
+    # Column heights from the first filled row of each column
+    filled_columns = blocks_seen[:, -1, :]
+    heights = np.where(filled_columns, height - boards.argmax(axis=1), 0)
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    blocks_in_rightmost_lane = boards[:, :, -1].sum(axis=1)
+    lines_cleared = boards.all(axis=2).sum(axis=1)
+
+    return np.stack([
+        holes,
+        blocks_above_holes,
+        pillars,
+        max_heights,
+        bumpiness,
+        blocks_in_rightmost_lane,
+        lines_cleared,
+    ], axis=1).astype(np.int64)
+
+
+def compute_weights(features, brain):
+    # Brain.compute_weight for every feature vector at once. The terms are summed in the same order
+    # as the scalar version so the floats (and therefore the chosen move) come out identical.
+    features = features.astype(np.float64)
+    total_weight = (features[:, 0] * brain.holes_weight +
+                    features[:, 2] * brain.pillars_weight +
+                    features[:, 1] * brain.blocks_above_holes_weight +
+                    features[:, 3] * brain.max_height_weight +
+                    features[:, 4] * brain.bumpiness_weight +
+                    features[:, 5] * brain.blocks_in_rightmost_lane_weight)
+    return np.where(features[:, 6] == 4, total_weight * 0.5, total_weight)
+
+
+def evaluate_placements(board, placements, brain):
+    # Score (placement, col, row) placements in one batch, see reachability.reachable_placements.
+    # Returns their (count, 7) features and (count,) weights.
+    if not placements:
+        return np.zeros((0, 7), dtype=np.int64), np.zeros(0)
+    boards, max_heights = stack_placements(board, placements)
+    features = compute_features(boards, max_heights)
+    return features, compute_weights(features, brain)